@@ -0,0 +1,272 @@
+import argparse
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from email.message import Message
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+from checkpoint import normalize_detail_url
+from sinks import EARTH911_FIELDS, CsvRecordSink, JsonArrayRecordSink, JsonLinesRecordSink
+
+# The stored body is the decoded text, so headers describing the original transfer no longer apply
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+DETAIL_PATH_PATTERN = re.compile(r'^/(location|program)/')
+
+
+class ArchiveWriter:
+    def __init__(self, path='earth911_capture.warc.gz'):
+        """Appends raw responses to a WARC 1.0 file, one gzip member per record"""
+        self.path = path
+        self.lock = threading.Lock()
+        self.count = 0
+        # Appending keeps earlier captures; concatenated gzip members are still one valid .warc.gz
+        self.file = open(path, 'ab')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_record(self, record_type, url, content_type, block):
+        header = (
+            "WARC/1.0\r\n"
+            f"WARC-Type: {record_type}\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(block)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        data = gzip.compress(header + block + b"\r\n\r\n")
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+            self.count += 1
+
+    def write_response(self, url, status_code, headers, body):
+        """Archive an HTTP response: status line, headers and decoded body"""
+        body_bytes = body.encode('utf-8')
+        try:
+            reason = HTTPStatus(status_code).phrase
+        except ValueError:
+            reason = ''
+        lines = [f"HTTP/1.1 {status_code} {reason}".rstrip()]
+        for name, value in (headers or {}).items():
+            if name.lower() not in DROPPED_HEADERS:
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body_bytes)}")
+        http_head = ("\r\n".join(lines) + "\r\n\r\n").encode('utf-8')
+        self._write_record('response', url, 'application/http;msgtype=response', http_head + body_bytes)
+
+    def write_resource(self, url, body, content_type='text/html; charset=utf-8'):
+        """Archive content that did not come with an HTTP response, e.g. a browser's rendered page"""
+        self._write_record('resource', url, content_type, body.encode('utf-8'))
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+                print(f"Archived {self.count} responses to {self.path}")
+
+
+def read_headers(stream):
+    """Read header lines up to the blank line; returns (first line, Message) or (None, None) at EOF"""
+    first = stream.readline()
+    while first in (b"\r\n", b"\n"):
+        first = stream.readline()
+    if not first:
+        return None, None
+    headers = Message()
+    for line in iter(stream.readline, b""):
+        line = line.rstrip(b"\r\n")
+        if not line:
+            break
+        name, _, value = line.decode('utf-8').partition(':')
+        headers[name.strip()] = value.strip()
+    return first.decode('utf-8').strip(), headers
+
+
+def iter_archive(path):
+    """Yield each response/resource record in a .warc.gz as a dict with url, type, status, headers and body"""
+    with gzip.open(path, 'rb') as stream:
+        while True:
+            version, warc_headers = read_headers(stream)
+            if version is None:
+                return
+            block = stream.read(int(warc_headers['Content-Length']))
+            record_type = warc_headers['WARC-Type']
+            if record_type not in ('response', 'resource'):
+                continue
+
+            record = {
+                'url': warc_headers['WARC-Target-URI'],
+                'type': record_type,
+                'date': warc_headers['WARC-Date'],
+                'status': 200,
+                'headers': {'Content-Type': warc_headers['Content-Type']}
+            }
+            if record_type == 'response':
+                block_stream = io.BytesIO(block)
+                status_line, http_headers = read_headers(block_stream)
+                record['status'] = int(status_line.split()[1])
+                record['headers'] = dict(http_headers.items())
+                block = block_stream.read()
+            record['body'] = block.decode('utf-8', errors='replace')
+            yield record
+
+
+def classify(record):
+    """Which extractor a captured page belongs to, or None for pages nothing is extracted from"""
+    if record['status'] >= 400:
+        return None
+    parsed = urlparse(record['url'])
+    if 'bestbuy.com' in parsed.netloc:
+        content_type = record['headers'].get('Content-Type', '')
+        return 'bestbuy-json' if 'json' in content_type else 'bestbuy-page'
+    if DETAIL_PATH_PATTERN.match(parsed.path):
+        return 'earth911-detail'
+    # Search result pages only feed the crawl; their records come from the detail pages
+    return None
+
+
+# Each re-extraction worker builds its network-free extractors once
+_earth911_scraper = None
+_bestbuy_scraper = None
+
+
+def _reextract(job):
+    """Run the current extractor for one captured page; returns (kind, url, records)"""
+    global _earth911_scraper, _bestbuy_scraper
+    kind, url, body = job
+
+    if kind == 'earth911-detail':
+        if _earth911_scraper is None:
+            from main import Earth911Scraper
+            _earth911_scraper = Earth911Scraper()
+        data = _earth911_scraper.parse_detail_content(body)
+        return kind, url, [data] if data and data['Business_Name'] else []
+
+    if _bestbuy_scraper is None:
+        # bonus imports selenium, which only Best Buy captures need
+        from bonus import BestBuyStoreLocatorScraper
+        _bestbuy_scraper = BestBuyStoreLocatorScraper(browserless=True)
+    # The Best Buy extractors log every store; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == 'bestbuy-json':
+            try:
+                stores = _bestbuy_scraper.stores_from_json(json.loads(body))
+            except ValueError:
+                stores = []
+        else:
+            stores = (_bestbuy_scraper.extract_stores_from_html(body)
+                      or _bestbuy_scraper.extract_stores_from_embedded_json(body))
+    return kind, url, stores
+
+
+def capture_key(kind, url):
+    """What identifies one captured page: detail URLs without their search context, other URLs as they are"""
+    return normalize_detail_url(url) if kind == 'earth911-detail' else url
+
+
+def iter_jobs(path, counts):
+    """(kind, url, body) for every capture with an extractor, each page once (the latest capture wins)"""
+    # Captures are appended across runs; a first pass finds the newest record of each page
+    latest = {}
+    for position, record in enumerate(iter_archive(path)):
+        kind = classify(record)
+        if kind is not None:
+            latest[capture_key(kind, record['url'])] = position
+
+    for position, record in enumerate(iter_archive(path)):
+        counts['records'] += 1
+        kind = classify(record)
+        if kind is None or latest.get(capture_key(kind, record['url'])) != position:
+            continue
+        yield kind, record['url'], record['body']
+
+
+def reextract(path, out_prefix='reextracted', workers=None, batch_size=64):
+    """Run the current Earth911 and Best Buy extractors over an archive in parallel, offline"""
+    started = time.perf_counter()
+    counts = {'records': 0, 'pages': 0, 'earth911': 0, 'bestbuy': 0}
+    earth911_sinks = [
+        CsvRecordSink(f"{out_prefix}_earth911.csv", EARTH911_FIELDS),
+        JsonArrayRecordSink(f"{out_prefix}_earth911.json", EARTH911_FIELDS),
+        JsonLinesRecordSink(f"{out_prefix}_earth911.jsonl", EARTH911_FIELDS)
+    ]
+    stores = []
+
+    jobs = iter_jobs(path, counts)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # Submit in batches so a large archive is never held in memory all at once
+        while True:
+            batch = list(itertools.islice(jobs, batch_size))
+            if not batch:
+                break
+            for kind, url, records in executor.map(_reextract, batch, chunksize=8):
+                counts['pages'] += 1
+                if kind == 'earth911-detail':
+                    for data in records:
+                        for sink in earth911_sinks:
+                            sink.write(data)
+                        counts['earth911'] += 1
+                else:
+                    # Every captured page numbers its stores from 1; number them across the whole run
+                    for store in records:
+                        stores.append(dict(store, store_number=len(stores) + 1))
+                    counts['bestbuy'] += len(records)
+
+    for sink in earth911_sinks:
+        sink.close()
+    if stores:
+        from bonus import save_stores_to_csv, save_stores_to_json
+        save_stores_to_csv(stores, f"{out_prefix}_bestbuy.csv")
+        save_stores_to_json(stores, f"{out_prefix}_bestbuy.json")
+
+    elapsed = time.perf_counter() - started
+    print(f"Re-extracted {counts['pages']} pages out of {counts['records']} archived responses in {elapsed:.2f}s: "
+          f"{counts['earth911']} Earth911 records, {counts['bestbuy']} Best Buy stores")
+    return counts
+
+
+def summarize(path):
+    """Count archived responses by host and extractor"""
+    summary = {}
+    for record in iter_archive(path):
+        key = (urlparse(record['url']).netloc, classify(record) or 'other', record['status'])
+        summary[key] = summary.get(key, 0) + 1
+    for (host, kind, status), count in sorted(summary.items()):
+        print(f"{count:>7}  {host:<30} {kind:<16} HTTP {status}")
+    return summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Inspect capture archives and re-run the extractors over them offline")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="Count archived responses by host and page type")
+    list_parser.add_argument('archive')
+
+    reextract_parser = commands.add_parser('reextract', help="Run the current extractors over an archive")
+    reextract_parser.add_argument('archive')
+    reextract_parser.add_argument('--out-prefix', default='reextracted')
+    reextract_parser.add_argument('--workers', type=int, default=None)
+    args = arg_parser.parse_args()
+
+    if args.command == 'list':
+        summarize(args.archive)
+    else:
+        reextract(args.archive, args.out_prefix, args.workers)
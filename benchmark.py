@@ -0,0 +1,307 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from main import Earth911Scraper, SEARCH_PAGE_STRAINER, DETAIL_PAGE_STRAINER
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Dates in the formats parse_date handles, as they appear on listings and detail pages
+SAMPLE_DATES = [
+    'Updated May 15, 2013', 'Updated February 23, 2016', 'Updated Sep 3 2019',
+    '5/15/2013', '2013-5-15', '12-31-2020', 'Updated sometime last year'
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def available_parsers():
+    """Parser backends installed in this environment"""
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+def time_it(func, iterations):
+    """Average milliseconds per call over the given number of iterations"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def benchmark_parsers(iterations=50):
+    """Time Earth911 search and detail extraction for each parser backend, full and partial"""
+    search_html = load_fixture('earth911_search.html')
+    detail_html = load_fixture('earth911_detail.html')
+    results = []
+
+    for parser in available_parsers():
+        for partial_parse in (False, True):
+            scraper = Earth911Scraper(parser=parser, partial_parse=partial_parse)
+            search_ms = time_it(lambda: scraper.extract_listing_items(scraper.make_soup(search_html, SEARCH_PAGE_STRAINER)), iterations)
+            detail_ms = time_it(lambda: scraper.parse_detail_content(detail_html), iterations)
+            results.append({
+                'parser': parser,
+                'mode': 'partial' if partial_parse else 'full',
+                'search_ms': search_ms,
+                'detail_ms': detail_ms
+            })
+
+    return results
+
+
+def benchmark_store_extraction(iterations=50):
+    """Time Best Buy store extraction from the whole page source versus the store list alone"""
+    try:
+        # bonus imports selenium, which only this benchmark needs
+        from bonus import BestBuyStoreLocatorScraper
+    except ImportError as e:
+        print(f"Skipping Best Buy store extraction: {e}")
+        return []
+    
+    page_html = load_fixture('bestbuy_results.html')
+    # What STORE_LIST_SCRIPT hands back from a live page: the list element's outerHTML
+    list_html = re.search(r'<ol\b.*</ol>', page_html, re.S).group(0)
+    scraper = BestBuyStoreLocatorScraper(browserless=True)
+    results = []
+    
+    for source, html in (('page_source', page_html), ('store list', list_html)):
+        # The extractor logs every store; keep that out of the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            stores = scraper.extract_stores_from_html(html)
+            page_ms = time_it(lambda: scraper.extract_stores_from_html(html), iterations)
+        results.append({
+            'source': source,
+            'kb': len(html.encode('utf-8')) / 1024,
+            'stores': len(stores),
+            'page_ms': page_ms,
+            'store_ms': page_ms / len(stores) if stores else 0.0
+        })
+    
+    scraper.close()
+    return results
+
+
+def print_store_results(results):
+    baseline = results[0]['page_ms']
+    print(f"{'source':<12} {'KiB':>7} {'stores':>7} {'ms/page':>9} {'ms/store':>9} {'speedup':>8}")
+    for row in results:
+        print(f"{row['source']:<12} {row['kb']:>7.1f} {row['stores']:>7} {row['page_ms']:>9.2f} "
+              f"{row['store_ms']:>9.3f} {baseline / row['page_ms']:>7.1f}x")
+
+
+def print_results(results):
+    baseline = results[0]['detail_ms']
+    print(f"{'parser':<12} {'mode':<8} {'search ms':>10} {'detail ms':>10} {'detail speedup':>15}")
+    for row in results:
+        print(f"{row['parser']:<12} {row['mode']:<8} {row['search_ms']:>10.2f} {row['detail_ms']:>10.2f} "
+              f"{baseline / row['detail_ms']:>14.1f}x")
+
+
+def calibrate(runs=5):
+    """Milliseconds for a fixed pure-Python loop; stage times are expressed in these units"""
+    def workload():
+        total = 0
+        for i in range(50000):
+            total += i % 7
+        return total
+    return min(time_it(workload, 1) for _ in range(runs))
+
+
+def measure(stage, func, iterations, items_per_call=1, unit='page', repeats=3):
+    """Time a stage, then run it once more under tracemalloc for its peak and retained allocations"""
+    func()  # Warm-up: imports, regex compilation and selector caches are not part of the stage
+    # The fastest of a few rounds is the least disturbed by whatever else the machine is doing
+    ms_per_call = min(time_it(func, max(1, iterations // repeats)) for _ in range(repeats))
+    # Calibrating next to the stage cancels out CPU frequency changes and noisy neighbours
+    calibration_ms = (calibrate() + calibrate()) / 2
+
+    tracemalloc.start()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'stage': stage,
+        'unit': unit,
+        'ms_per_item': ms_per_call / items_per_call,
+        'items_per_sec': items_per_call * 1000 / ms_per_call if ms_per_call else 0.0,
+        'relative_cost': ms_per_call / items_per_call / calibration_ms,
+        'peak_kib': peak / 1024,
+        'retained_kib': current / 1024
+    }
+
+
+def benchmark_suite(iterations=50):
+    """Time and memory-profile each extraction and save stage on the fixture pages, without network access"""
+    search_html = load_fixture('earth911_search.html')
+    detail_html = load_fixture('earth911_detail.html')
+    scraper = Earth911Scraper()
+    detail_soup = scraper.make_soup(detail_html, DETAIL_PAGE_STRAINER)
+    save_iterations = max(1, iterations // 5)
+    results = []
+
+    results.append(measure('earth911 search page', lambda: scraper.extract_listing_items(
+        scraper.make_soup(search_html, SEARCH_PAGE_STRAINER)), iterations))
+    results.append(measure('earth911 detail page', lambda: scraper.parse_detail_content(detail_html), iterations))
+    results.append(measure('earth911 materials table', lambda: scraper.extract_materials_from_table(detail_soup),
+                           iterations))
+    results.append(measure('earth911 parse_date', lambda: [scraper.parse_date(date) for date in SAMPLE_DATES],
+                           iterations * 20, len(SAMPLE_DATES), 'date'))
+
+    # A few hundred copies of the fixture record stand in for a full crawl's output
+    scraper.scraped_data = [scraper.parse_detail_content(detail_html)] * 200
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        csv_path = os.path.join(output_dir, 'records.csv')
+        json_path = os.path.join(output_dir, 'records.json')
+        results.append(measure('earth911 save_to_csv', lambda: scraper.save_to_csv(csv_path),
+                               save_iterations, len(scraper.scraped_data), 'record'))
+        results.append(measure('earth911 save_to_json', lambda: scraper.save_to_json(json_path),
+                               save_iterations, len(scraper.scraped_data), 'record'))
+    scraper.close()
+
+    try:
+        # bonus imports selenium, which the Best Buy stages need even though no browser is started
+        import bonus
+    except ImportError as e:
+        print(f"Skipping Best Buy stages: {e}")
+        return results
+
+    page_html = load_fixture('bestbuy_results.html')
+    # The locator page as served before any script runs, stores only in its embedded state JSON
+    locator_html = load_fixture('bestbuy_locator_embedded.html')
+    bestbuy = bonus.BestBuyStoreLocatorScraper(browserless=True)
+    containers = bonus.make_soup(page_html, parse_only=bonus.STORE_CARD_STRAINER).find_all(
+        'li', {'data-cy': 'LocationCardListItemComponent'})
+    # The extractors and save functions log every store and file; keep that out of the timings
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        stores = bestbuy.extract_stores_from_html(page_html) * 20
+        csv_path = os.path.join(output_dir, 'stores.csv')
+        json_path = os.path.join(output_dir, 'stores.json')
+        results.append(measure('bestbuy results page', lambda: bestbuy.extract_stores_from_html(page_html), iterations))
+        results.append(measure('bestbuy embedded JSON', lambda: bestbuy.extract_stores_from_embedded_json(locator_html),
+                               iterations))
+        results.append(measure('bestbuy store card', lambda: [
+            bestbuy.parse_store_container(container, number) for number, container in enumerate(containers, 1)
+        ], iterations, len(containers), 'store'))
+        results.append(measure('bestbuy save_stores_to_csv', lambda: bonus.save_stores_to_csv(stores, csv_path),
+                               save_iterations, len(stores), 'store'))
+        results.append(measure('bestbuy save_stores_to_json', lambda: bonus.save_stores_to_json(stores, json_path),
+                               save_iterations, len(stores), 'store'))
+    bestbuy.close()
+    return results
+
+
+def best_of(rounds):
+    """Per-stage cheapest run, with the smallest peak, over several suite runs"""
+    best = {}
+    for results in rounds:
+        for row in results:
+            kept = best.get(row['stage'])
+            if kept is None:
+                best[row['stage']] = row
+                continue
+            peak_kib = min(kept['peak_kib'], row['peak_kib'])
+            if row['relative_cost'] < kept['relative_cost']:
+                best[row['stage']] = kept = row
+            kept['peak_kib'] = peak_kib
+    return list(best.values())
+
+
+def print_suite_results(results):
+    print(f"{'stage':<28} {'ms/item':>9} {'items/s':>13} {'peak KiB':>9} {'retained KiB':>13}")
+    for row in results:
+        rate = f"{row['items_per_sec']:.0f} {row['unit']}s"
+        print(f"{row['stage']:<28} {row['ms_per_item']:>9.3f} {rate:>13} {row['peak_kib']:>9.1f} "
+              f"{row['retained_kib']:>13.1f}")
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    baseline = {
+        row['stage']: {
+            'relative_cost': round(row['relative_cost'], 5),
+            'ms_per_item': round(row['ms_per_item'], 4),
+            'peak_kib': round(row['peak_kib'], 1)
+        }
+        for row in results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+    print(f"Baseline saved to {path}")
+
+
+def check_baseline(results, tolerance=1.0, path=BASELINE_FILE):
+    """Names of stages slower or using more memory than the baseline allows"""
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    # Times are compared relative to the calibration loop, so the baseline holds on faster or slower machines
+    print(f"\nChecking against {os.path.basename(path)} (tolerance {tolerance:.0%})")
+    regressions = []
+    for row in results:
+        expected = baseline.get(row['stage'])
+        if expected is None:
+            print(f"  {row['stage']}: not in baseline")
+            continue
+
+        # Allocations do not depend on machine speed; a little absolute slack absorbs interpreter noise
+        memory_limit = expected['peak_kib'] * (1 + tolerance) + 16
+        slowdown = row['relative_cost'] / expected['relative_cost']
+        problems = []
+        if slowdown > 1 + tolerance:
+            problems.append(f"{slowdown:.2f}x slower")
+        if row['peak_kib'] > memory_limit:
+            problems.append(f"{row['peak_kib']:.1f} KiB > {memory_limit:.1f} KiB peak")
+        if problems:
+            regressions.append(row['stage'])
+        print(f"  {row['stage']}: {'REGRESSED, ' + ', '.join(problems) if problems else f'ok ({slowdown:.2f}x)'}")
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the extraction and save stages on saved fixture pages, offline")
+    arg_parser.add_argument('--iterations', type=int, default=50)
+    arg_parser.add_argument('--rounds', type=int, default=3, help="Suite runs; each stage keeps its best")
+    arg_parser.add_argument('--compare-parsers', action='store_true',
+                            help="Compare parser backends and page source vs store list extraction instead")
+    arg_parser.add_argument('--save-baseline', action='store_true', help="Record these results as the baseline")
+    arg_parser.add_argument('--check', action='store_true', help="Exit with status 1 if a stage regressed from the baseline")
+    arg_parser.add_argument('--tolerance', type=float, default=1.0, help="Allowed slowdown or memory growth (1.0 = up to 2x)")
+    args = arg_parser.parse_args()
+
+    if args.compare_parsers:
+        print_results(benchmark_parsers(args.iterations))
+        print()
+        store_results = benchmark_store_extraction(args.iterations)
+        if store_results:
+            print_store_results(store_results)
+        sys.exit(0)
+
+    suite_results = best_of(benchmark_suite(args.iterations) for _ in range(args.rounds))
+    print_suite_results(suite_results)
+
+    if args.save_baseline:
+        save_baseline(suite_results)
+    if args.check:
+        regressed = check_baseline(suite_results, args.tolerance)
+        if regressed:
+            print(f"{len(regressed)} stage(s) regressed: {', '.join(regressed)}")
+            sys.exit(1)
+        print("No regressions")
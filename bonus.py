@@ -4,71 +4,393 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from bs4 import SoupStrainer
+import soupsieve
 import time
 import csv
 import json
 import re
+import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from parsing import make_soup
+from transport import RequestsTransport, TransportError
+from archive import ArchiveWriter
+from metrics import Metrics
+from urllib.parse import urlparse
+
+# Result pages normally only need the location cards
+STORE_CARD_STRAINER = SoupStrainer('li', attrs={'data-cy': 'LocationCardListItemComponent'})
+
+# Presumed JSON endpoint behind the store-locator page. It has not been confirmed against the live
+# site, so it is only requested when passed explicitly: BestBuyStoreLocatorScraper(api_url=STORE_LOCATOR_API_URL)
+STORE_LOCATOR_API_URL = "https://www.bestbuy.com/location/v1/US/zipcode/{zipcode}/stores?locationType=Store&pageSize=10"
+
+# schema.org types that describe a store; JSON-LD blocks of any other type (Organization, WebSite) are not stores
+STORE_LD_TYPES = {'Store', 'ElectronicsStore', 'LocalBusiness'}
+# Keys a store object from the locator state carries besides its name and address
+STORE_ID_KEYS = ('id', 'storeId', 'locationId')
+STORE_DETAIL_KEYS = ('distance', 'distanceInMiles', 'hoursToday', 'todayHours', 'openingHours', 'hours', 'locationType')
+
+STORE_FIELDS = ['store_number', 'store_name', 'address', 'hours', 'distance', 'phone', 'store_details_link']
+
+# Candidate selectors, raced against each other in a single wait
+ZIP_INPUT_SELECTORS = [
+    "input[placeholder*='ZIP']",
+    "input[placeholder*='City']",
+    "input[aria-label*='Enter city']",
+    ".zip-code-input",
+    "input[data-cy='ZipCodeInputComponent']",
+    "input[type='text'][placeholder]"
+]
+
+STORE_RESULT_SELECTORS = [
+    "li[data-cy='LocationCardListItemComponent']",
+    ".location-card",
+    ".store-card"
+]
+
+# Fallback selectors per field, most specific first
+STORE_FIELD_SELECTORS = {
+    'store_name': [
+        'h2 button[data-cy="store-heading"]',
+        'h2.location-card-title button',
+        '.location-card-title button',
+        'h2 button',
+        '.store-name'
+    ],
+    'address': [
+        'span[data-cy="AddressComponent"]',
+        '.loc-address',
+        '.store-address',
+        '.address'
+    ],
+    'hours': [
+        'span[data-cy="BusinessHoursComponent"]',
+        '.hours',
+        '.store-hours',
+        '.business-hours'
+    ],
+    'distance': [
+        'p[data-cy="LocationDistance"]',
+        '.location-distance p',
+        '.distance'
+    ],
+    'store_details_link': [
+        'a[data-cy="DetailsComponent"]',
+        'a.details'
+    ]
+}
+
+# Last-resort selectors, tried after every specific one and never promoted ahead of them
+STORE_FIELD_FALLBACKS = {
+    'store_name': ['h2', 'h3'],
+    'store_details_link': ['a[href*="stores.bestbuy.com"]']
+}
+
+# Returns the outerHTML of the list holding the store cards, so Python only parses that subtree
+STORE_LIST_SCRIPT = """
+for (const selector of arguments[0]) {
+    const card = document.querySelector(selector);
+    if (card) {
+        const list = card.closest('ol, ul') || card.parentElement;
+        return list.outerHTML;
+    }
+}
+return null;
+"""
+
+# Text that marks a store card when none of the card selectors match, as one alternation
+STORE_TEXT_PATTERN = re.compile(
+    r'Chelsea \([^)]+\)|\d+\.\d+ miles away|Open until \d+ [ap]m|\d+ W \d+\w+ St'
+)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Requests the lean profile drops before they leave the browser: media files and
+# the ad/analytics hosts the locator page loads alongside its own scripts
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.woff", "*.woff2", "*.ttf",
+    "*doubleclick.net*", "*googlesyndication.com*", "*google-analytics.com*",
+    "*googletagmanager.com*", "*googleadservices.com*", "*facebook.net*",
+    "*facebook.com/tr*", "*adobedtm.com*", "*omtrdc.net*", "*demdex.net*",
+    "*criteo.com*", "*criteo.net*", "*pinimg.com*", "*bing.com/bat*",
+    "*hotjar.com*", "*quantummetric.com*", "*tiktok.com*", "*snapchat.com*"
+]
+
+def build_chrome_options(headless=True, lean=True):
+    """Chrome options for the scraper; the lean profile skips everything the extractor never reads"""
+    chrome_options = Options()
+    if headless:
+        # The new headless mode runs the real browser, which pages detect far less often than the old shell
+        chrome_options.add_argument("--headless=new" if lean else "--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    
+    if lean:
+        # Hand control back at DOMContentLoaded; the search waits for the elements it needs anyway
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-component-update")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("--disable-sync")
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2
+        })
+    return chrome_options
+
+def create_driver(headless=True, lean=True):
+    """Start a Chrome WebDriver with the scraper's options"""
+    driver = webdriver.Chrome(options=build_chrome_options(headless, lean))
+    # Explicit readiness waits only; an implicit wait would stall every miss in find_elements
+    driver.implicitly_wait(0)
+    
+    if lean:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            # Pages that honour reduced motion skip their CSS animations and transitions
+            driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+                "features": [{"name": "prefers-reduced-motion", "value": "reduce"}]
+            })
+        except (WebDriverException, AttributeError) as e:
+            print(f"Could not apply request blocking: {e}")
+    return driver
+
+def browser_rss(driver):
+    """Resident memory in MB of the browser behind a driver (chromedriver and every Chrome process), or None"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return None
+    
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            # Renderer processes come and go while the page runs
+            pass
+    return total / (1024 * 1024)
+
+def compare_profiles(url="https://www.bestbuy.com/site/store-locator", runs=3, headless=True):
+    """Load a page with the default and lean profiles and report load time and browser RSS for each"""
+    results = []
+    for lean in (False, True):
+        driver = create_driver(headless, lean)
+        load_times = []
+        try:
+            for _ in range(runs):
+                driver.get("about:blank")
+                started = time.perf_counter()
+                driver.get(url)
+                load_times.append(time.perf_counter() - started)
+            rss = browser_rss(driver)
+        finally:
+            driver.quit()
+        
+        results.append({
+            'profile': 'lean' if lean else 'default',
+            'load_seconds': sum(load_times) / len(load_times),
+            'rss_mb': rss
+        })
+    
+    print(f"\n=== Browser profile comparison ({runs} loads of {url}) ===")
+    print(f"{'profile':<10} {'avg load s':>11} {'browser RSS MB':>15}")
+    for row in results:
+        rss = f"{row['rss_mb']:.0f}" if row['rss_mb'] is not None else "n/a (pip install psutil)"
+        print(f"{row['profile']:<10} {row['load_seconds']:>11.2f} {rss:>15}")
+    return results
+
+def reset_driver(driver):
+    """Clear cookies and storage left by the previous job and park the browser on a blank page"""
+    driver.delete_all_cookies()
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except WebDriverException:
+        # Some pages (about:blank, error pages) have no storage to clear
+        pass
+    driver.get("about:blank")
+
+def save_stores_to_csv(stores, filename='bestbuy_stores.csv'):
+    """Save store records to CSV file"""
+    if not stores:
+        print("No data to save")
+        return
+    
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=STORE_FIELDS)
+        
+        writer.writeheader()
+        for store in stores:
+            writer.writerow(store)
+    
+    print(f"Data saved to {filename}")
+
+def save_stores_to_json(stores, filename='bestbuy_stores.json'):
+    """Save store records to JSON file"""
+    if not stores:
+        print("No data to save")
+        return
+    
+    with open(filename, 'w', encoding='utf-8') as jsonfile:
+        json.dump(stores, jsonfile, indent=2, ensure_ascii=False)
+    
+    print(f"Data saved to {filename}")
+
+class SelectorChain:
+    def __init__(self, selectors, fallbacks=()):
+        """Fallback CSS selectors compiled once; whichever specific selector matched last is tried first next time"""
+        self.original = [(selector, soupsieve.compile(selector)) for selector in selectors]
+        self.selectors = list(self.original)
+        # Generic catch-alls would match every card once promoted, so they always stay last
+        self.fallbacks = [(selector, soupsieve.compile(selector)) for selector in fallbacks]
+        self.hits = {selector: 0 for selector in list(selectors) + list(fallbacks)}
+    
+    def reset(self):
+        """Restore the declared order, so one page's layout does not decide how the next is read"""
+        self.selectors = list(self.original)
+    
+    def select_one(self, tag):
+        for index, (selector, compiled) in enumerate(self.selectors):
+            element = compiled.select_one(tag)
+            if element is not None:
+                self.hits[selector] += 1
+                if index:
+                    # Cards on one page share a layout, so the winner usually wins again
+                    self.selectors.insert(0, self.selectors.pop(index))
+                return element
+        for selector, compiled in self.fallbacks:
+            element = compiled.select_one(tag)
+            if element is not None:
+                self.hits[selector] += 1
+                return element
+        return None
+
+def first_present(selectors):
+    """Wait condition returning (selector, element) for the first selector that matches anything"""
+    def condition(driver):
+        for selector in selectors:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                return selector, elements[0]
+        return False
+    return condition
+
+def results_replaced(old_card, zipcode):
+    """Wait condition that holds once the pre-search store list is gone or the URL carries the new ZIP"""
+    stale = EC.staleness_of(old_card)
+    
+    def condition(driver):
+        return stale(driver) or zipcode in driver.current_url
+    return condition
+
+def network_idle(quiet_period=0.5):
+    """Wait condition that holds once no new resources have loaded for quiet_period seconds"""
+    state = {'count': -1, 'since': time.monotonic()}
+    
+    def condition(driver):
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        now = time.monotonic()
+        if count != state['count']:
+            state['count'] = count
+            state['since'] = now
+            return False
+        return now - state['since'] >= quiet_period
+    return condition
 
 class BestBuyStoreLocatorScraper:
-    def __init__(self, headless=True):
-        """Initialize the scraper with Chrome WebDriver"""
+    def __init__(self, headless=True, browserless=False, driver=None, lean=True, archive=None, metrics=None, api_url=None):
+        """Initialize the scraper with Chrome WebDriver, or lazily when browserless"""
         self.base_url = "https://www.bestbuy.com/site/store-locator"
-        self.driver = None
+        # Optional store JSON endpoint with a {zipcode} placeholder, tried before the locator page in browserless mode
+        self.api_url = api_url
+        # A driver passed in (e.g. from a WebDriverPool) belongs to the caller and is not quit on close
+        self.driver = driver
+        self.owns_driver = driver is None
+        self.headless = headless
+        # Lean profile: no images/media/trackers, eager page loads, --headless=new
+        self.lean = lean
         self.scraped_data = []
-        self.setup_driver(headless)
+        self.used_browser = False
+        # (description, seconds, succeeded) for every readiness wait
+        self.wait_timings = []
+        self.selector_chains = {
+            field: SelectorChain(selectors, STORE_FIELD_FALLBACKS.get(field, ()))
+            for field, selectors in STORE_FIELD_SELECTORS.items()
+        }
+        # Optional archive.ArchiveWriter, shared and closed by the caller; captures every
+        # response and rendered results page for `python archive.py reextract`
+        self.archive = archive
+        # Selenium waits, HTTP fetches and extraction times (metrics.Metrics, shareable across scrapers)
+        self.metrics = metrics or Metrics()
+        # Browserless mode reads the store JSON over plain HTTP and only
+        # starts Chrome if that lookup comes back empty
+        self.browserless = browserless
+        self.transport = RequestsTransport(headers={
+            'User-Agent': USER_AGENT,
+            'Accept': 'application/json, text/html;q=0.9, */*;q=0.8'
+        }) if browserless else None
+        if not browserless and driver is None:
+            self.setup_driver(headless)
     
     def setup_driver(self, headless=True):
         """Setup Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.implicitly_wait(10)
+            self.driver = create_driver(headless, self.lean)
             print("Chrome WebDriver initialized successfully")
         except Exception as e:
             print(f"Failed to initialize Chrome WebDriver: {e}")
             print("Please make sure ChromeDriver is installed and in your PATH")
             raise
     
+    def wait_for(self, description, condition, timeout=10):
+        """Wait until a condition holds, logging how long it took; raises TimeoutException"""
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(condition)
+        except TimeoutException:
+            elapsed = time.monotonic() - started
+            self.wait_timings.append((description, elapsed, False))
+            self.metrics.observe('scraper_selenium_wait_seconds', elapsed, wait=description, outcome='timeout')
+            print(f"Timed out after {elapsed:.2f}s waiting for {description}")
+            raise
+        elapsed = time.monotonic() - started
+        self.wait_timings.append((description, elapsed, True))
+        self.metrics.observe('scraper_selenium_wait_seconds', elapsed, wait=description, outcome='ready')
+        print(f"Waited {elapsed:.2f}s for {description}")
+        return result
+    
     def search_stores_by_zipcode(self, zipcode="10001"):
         """Navigate to Best Buy store locator and search by zip code"""
         try:
             print(f"Navigating to {self.base_url}")
             self.driver.get(self.base_url)
             
-            # Wait for the page to load
-            time.sleep(3)
-            
-            # Find the zip code input field (try multiple selectors)
-            zip_input = None
-            selectors = [
-                "input[placeholder*='ZIP']",
-                "input[placeholder*='City']", 
-                "input[aria-label*='Enter city']",
-                ".zip-code-input",
-                "input[data-cy='ZipCodeInputComponent']",
-                "input[type='text'][placeholder]"
-            ]
-            
-            for selector in selectors:
-                try:
-                    zip_input = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    print(f"Found input field using selector: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not zip_input:
+            # Race all candidate selectors in one wait instead of 5 seconds per selector
+            try:
+                selector, zip_input = self.wait_for("zip code input", first_present(ZIP_INPUT_SELECTORS), timeout=15)
+                print(f"Found input field using selector: {selector}")
+            except TimeoutException:
                 print("Could not find zip code input field. Available inputs:")
                 inputs = self.driver.find_elements(By.TAG_NAME, "input")
                 for i, inp in enumerate(inputs):
@@ -79,66 +401,70 @@ class BestBuyStoreLocatorScraper:
             print(f"Entering zip code: {zipcode}")
             zip_input.clear()
             zip_input.send_keys(zipcode)
-            time.sleep(1)
+            
+            # The locator may already list default or IP-based stores; remember them so they are not mistaken for results
+            old_results = first_present(STORE_RESULT_SELECTORS)(self.driver)
             
             # Try to find and click submit button or press Enter
-            try:
-                submit_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit'], .search-button, button:contains('Search')")
-                submit_button.click()
+            submit_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button[type='submit'], .search-button")
+            if submit_buttons:
+                submit_buttons[0].click()
                 print("Clicked submit button")
-            except:
+            else:
                 print("Submit button not found, pressing Enter")
                 zip_input.send_keys(Keys.RETURN)
             
-            # Wait for results to load
+            # Wait for the store list itself rather than a fixed delay
             print("Waiting for store results to load...")
-            time.sleep(5)
+            if old_results:
+                try:
+                    self.wait_for("previous results to be replaced", results_replaced(old_results[1], zipcode), timeout=10)
+                except TimeoutException:
+                    # Same list re-rendered in place (or the ZIP was already shown); give it the baseline's settle time
+                    time.sleep(5)
+            try:
+                selector, _ = self.wait_for("store results", first_present(STORE_RESULT_SELECTORS), timeout=15)
+                print(f"Store results ready ({selector})")
+            except TimeoutException:
+                # Unknown layout: let the page settle so the fallback extractors see everything
+                try:
+                    self.wait_for("network idle", network_idle(), timeout=5)
+                except TimeoutException:
+                    pass
             
             return True
             
         except Exception as e:
             print(f"Error during search: {e}")
-            print("Current page title:", self.driver.title)
-            print("Current URL:", self.driver.current_url)
+            try:
+                print("Current page title:", self.driver.title)
+                print("Current URL:", self.driver.current_url)
+            except WebDriverException:
+                # The browser is gone; let the caller retire this driver
+                raise
             return False
     
+    def store_list_html(self):
+        """outerHTML of the store-card list on the current page, or None if no card is present"""
+        try:
+            return self.driver.execute_script(STORE_LIST_SCRIPT, STORE_RESULT_SELECTORS)
+        except WebDriverException as e:
+            print(f"Could not read the store list from the page: {e}")
+            return None
+    
     def extract_store_data(self):
         """Extract store information from the results page"""
         try:
-            # Get page source and parse with BeautifulSoup
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            stores = []
-            
-            # Method 1: Look for location card containers
-            store_containers = soup.find_all('li', {'data-cy': 'LocationCardListItemComponent'})
-            
-            if not store_containers:
-                # Method 2: Look for store elements with different patterns
-                store_containers = soup.find_all('div', class_=re.compile(r'location-card|store-card'))
-            
-            if not store_containers:
-                # Method 3: Look for any elements containing store data
-                store_containers = soup.find_all('div', string=re.compile(r'miles away|Store Details'))
-                store_containers = [container.find_parent('div') for container in store_containers if container.find_parent('div')]
-            
-            print(f"Found {len(store_containers)} potential store containers")
-            
-            for i, container in enumerate(store_containers):
-                try:
-                    store_data = self.parse_store_container(container, i+1)
-                    if store_data and store_data['store_name']:  # Only add if we got valid data
-                        stores.append(store_data)
-                        print(f"  ✓ Extracted: {store_data['store_name']}")
-                    
-                except Exception as e:
-                    print(f"  ✗ Error parsing store {i+1}: {e}")
-                    continue
+            if self.archive is not None:
+                # Re-extraction needs the whole rendered page, not just the store list
+                self.archive.write_resource(self.driver.current_url, self.driver.page_source)
             
-            # If no stores found with primary method, try alternative extraction
-            if not stores:
-                stores = self.extract_stores_alternative_method(soup)
+            with self.metrics.timer('scraper_parse_seconds', page='bestbuy-results'):
+                # Parse just the store list when the page has one; the fallbacks need the whole document
+                list_html = self.store_list_html()
+                stores = self.extract_stores_from_html(list_html) if list_html else []
+                if not stores:
+                    stores = self.extract_stores_from_html(self.driver.page_source)
             
             self.scraped_data = stores
             return stores
@@ -147,6 +473,55 @@ class BestBuyStoreLocatorScraper:
             print(f"Error extracting store data: {e}")
             return []
     
+    def extract_stores_from_html(self, html):
+        """Extract store records from a results page or a fragment of one"""
+        # Selector order is learned per page; scrapers are reused across pages and worker jobs
+        for chain in self.selector_chains.values():
+            chain.reset()
+        
+        # Parse only the location cards with BeautifulSoup
+        soup = make_soup(html, parse_only=STORE_CARD_STRAINER)
+        strained = True
+        
+        stores = []
+        
+        # Method 1: Look for location card containers
+        store_containers = soup.find_all('li', {'data-cy': 'LocationCardListItemComponent'})
+        
+        if not store_containers:
+            # The fallback methods need the whole document
+            soup = make_soup(html)
+            strained = False
+            
+            # Method 2: Look for store elements with different patterns
+            store_containers = soup.find_all('div', class_=re.compile(r'location-card|store-card'))
+        
+        if not store_containers:
+            # Method 3: Look for any elements containing store data
+            store_containers = soup.find_all('div', string=re.compile(r'miles away|Store Details'))
+            store_containers = [container.find_parent('div') for container in store_containers if container.find_parent('div')]
+        
+        print(f"Found {len(store_containers)} potential store containers")
+        
+        for i, container in enumerate(store_containers):
+            try:
+                store_data = self.parse_store_container(container, i+1)
+                if store_data and store_data['store_name']:  # Only add if we got valid data
+                    stores.append(store_data)
+                    print(f"  ✓ Extracted: {store_data['store_name']}")
+                
+            except Exception as e:
+                print(f"  ✗ Error parsing store {i+1}: {e}")
+                continue
+        
+        # If no stores found with primary method, try alternative extraction
+        if not stores:
+            if strained:
+                soup = make_soup(html)
+            stores = self.extract_stores_alternative_method(soup)
+        
+        return stores
+    
     def parse_store_container(self, container, store_number):
         """Parse individual store container to extract data"""
         store_data = {
@@ -159,86 +534,43 @@ class BestBuyStoreLocatorScraper:
             'store_details_link': ''
         }
         
+        chains = self.selector_chains
+        
         # Extract store name
-        name_selectors = [
-            'h2 button[data-cy="store-heading"]',
-            'h2.location-card-title button',
-            '.location-card-title button',
-            'h2 button',
-            '.store-name',
-            'h2',
-            'h3'
-        ]
-        
-        for selector in name_selectors:
-            name_elem = container.select_one(selector)
-            if name_elem:
-                store_data['store_name'] = name_elem.get_text(strip=True)
-                break
+        name_elem = chains['store_name'].select_one(container)
+        if name_elem:
+            store_data['store_name'] = name_elem.get_text(strip=True)
         
         # Extract address
-        address_selectors = [
-            'span[data-cy="AddressComponent"]',
-            '.loc-address',
-            '.store-address',
-            '.address'
-        ]
-        
-        for selector in address_selectors:
-            addr_elem = container.select_one(selector)
-            if addr_elem:
-                # Get all text within address element
-                address_parts = []
-                for span in addr_elem.find_all('span'):
-                    text = span.get_text(strip=True)
-                    if text:
-                        address_parts.append(text)
-                
-                if address_parts:
-                    store_data['address'] = ', '.join(address_parts)
-                else:
-                    store_data['address'] = addr_elem.get_text(strip=True)
-                break
+        addr_elem = chains['address'].select_one(container)
+        if addr_elem:
+            # Get all text within address element
+            address_parts = []
+            for span in addr_elem.find_all('span'):
+                # React splits "City, ST 12345" into text nodes around comments; keep the spaces between them
+                text = span.get_text(' ', strip=True)
+                if text:
+                    address_parts.append(text)
+            
+            if address_parts:
+                store_data['address'] = ', '.join(address_parts)
+            else:
+                store_data['address'] = addr_elem.get_text(' ', strip=True)
         
         # Extract hours
-        hours_selectors = [
-            'span[data-cy="BusinessHoursComponent"]',
-            '.hours',
-            '.store-hours',
-            '.business-hours'
-        ]
-        
-        for selector in hours_selectors:
-            hours_elem = container.select_one(selector)
-            if hours_elem:
-                store_data['hours'] = hours_elem.get_text(strip=True)
-                break
+        hours_elem = chains['hours'].select_one(container)
+        if hours_elem:
+            store_data['hours'] = hours_elem.get_text(strip=True)
         
         # Extract distance
-        distance_selectors = [
-            'p[data-cy="LocationDistance"]',
-            '.location-distance p',
-            '.distance'
-        ]
-        
-        for selector in distance_selectors:
-            dist_elem = container.select_one(selector)
-            if dist_elem:
-                store_data['distance'] = dist_elem.get_text(strip=True)
-                break
+        dist_elem = chains['distance'].select_one(container)
+        if dist_elem:
+            store_data['distance'] = dist_elem.get_text(strip=True)
         
         # Extract store details link
-        details_selectors = [
-            'a[data-cy="DetailsComponent"]',
-            'a.details',
-            'a[href*="stores.bestbuy.com"]'
-        ]
-        
-        for selector in details_selectors:
-            details_elem = container.select_one(selector)
-            if details_elem:
-                store_data['store_details_link'] = details_elem.get('href', '')
-                break
+        details_elem = chains['store_details_link'].select_one(container)
+        if details_elem:
+            store_data['store_details_link'] = details_elem.get('href', '')
         
         # Extract phone from JSON data if available
         script_tags = container.find_all('script')
@@ -257,27 +589,16 @@ class BestBuyStoreLocatorScraper:
         print("Trying alternative extraction method...")
         stores = []
         
-        # Look for any text patterns that indicate stores
-        store_patterns = [
-            re.compile(r'Chelsea \([^)]+\)'),
-            re.compile(r'\d+\.\d+ miles away'),
-            re.compile(r'Open until \d+ [ap]m'),
-            re.compile(r'\d+ W \d+\w+ St')
-        ]
-        
-        # Search for elements containing these patterns
-        potential_stores = set()
-        for pattern in store_patterns:
-            elements = soup.find_all(string=pattern)
-            for elem in elements:
-                parent = elem.parent
-                while parent and parent.name != 'li':
-                    parent = parent.parent
-                if parent:
-                    potential_stores.add(parent)
+        # One pass over the text nodes for all the patterns that indicate stores;
+        # a dict keeps the cards in page order
+        potential_stores = {}
+        for elem in soup.find_all(string=STORE_TEXT_PATTERN):
+            parent = elem.find_parent('li')
+            if parent is not None and id(parent) not in potential_stores:
+                potential_stores[id(parent)] = parent
         
         # Try to extract data from found elements
-        for i, store_elem in enumerate(potential_stores):
+        for i, store_elem in enumerate(potential_stores.values()):
             try:
                 store_data = {
                     'store_number': i + 1,
@@ -321,32 +642,186 @@ class BestBuyStoreLocatorScraper:
         
         return stores
     
-    def save_to_csv(self, filename='bestbuy_stores.csv'):
-        """Save scraped data to CSV file"""
-        if not self.scraped_data:
-            print("No data to save")
-            return
+    def fetch_stores_via_http(self, zipcode="10001"):
+        """Look up stores without a browser, from the JSON endpoint if one is configured, then the page's embedded JSON"""
+        started = time.monotonic()
+        stores = []
+        
+        if self.api_url:
+            api_url = self.api_url.format(zipcode=zipcode)
+            print(f"Fetching store JSON: {api_url}")
+            payload = self.fetch_json(api_url)
+            if payload is not None:
+                stores = self.stores_from_json(payload)
         
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['store_number', 'store_name', 'address', 'hours', 'distance', 'phone', 'store_details_link']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        if not stores:
+            page_url = f"{self.base_url}?zipCode={zipcode}"
+            print(f"Reading embedded store JSON from {page_url}")
+            html = self.fetch_text(page_url)
+            if html:
+                stores = self.extract_stores_from_embedded_json(html)
+        
+        print(f"Browserless lookup found {len(stores)} stores in {time.monotonic() - started:.2f}s")
+        self.scraped_data = stores
+        return stores
+    
+    def fetch_text(self, url):
+        """GET a URL over plain HTTP, returning the body or None"""
+        host = urlparse(url).netloc
+        started = time.monotonic()
+        try:
+            response = self.transport.get(url, timeout=10)
+        except TransportError as e:
+            self.metrics.observe('scraper_fetch_seconds', time.monotonic() - started, host=host, status='error')
+            print(f"Request failed for {url}: {e}")
+            return None
+        self.metrics.observe('scraper_fetch_seconds', time.monotonic() - started, host=host, status=str(response.status_code))
+        self.metrics.inc('scraper_wire_bytes_total', response.wire_bytes, host=host)
+        self.metrics.inc('scraper_decoded_bytes_total', response.decoded_bytes, host=host)
+        if self.archive is not None:
+            self.archive.write_response(url, response.status_code, response.headers, response.text)
+        if response.status_code >= 400:
+            print(f"Request failed for {url}: HTTP {response.status_code}")
+            return None
+        return response.text
+    
+    def fetch_json(self, url):
+        text = self.fetch_text(url)
+        if not text:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            print(f"Response from {url} is not JSON")
+            return None
+    
+    def extract_stores_from_embedded_json(self, html):
+        """Find store records in JSON embedded in the page's script tags"""
+        soup = make_soup(html, parse_only=SoupStrainer('script'))
+        best = []
+        for script in soup.find_all('script'):
+            script_text = script.string or script.get_text()
+            if not script_text or ('address' not in script_text and 'Store' not in script_text):
+                continue
+            
+            # Either a pure JSON script (application/json, ld+json) or a "window.X = {...};" assignment
+            candidates = [script_text.strip()]
+            assignment = re.search(r'=\s*(\{.*\}|\[.*\])\s*;?\s*$', script_text, re.DOTALL)
+            if assignment:
+                candidates.append(assignment.group(1))
             
-            writer.writeheader()
-            for store in self.scraped_data:
-                writer.writerow(store)
+            for candidate in candidates:
+                try:
+                    payload = json.loads(candidate)
+                except ValueError:
+                    continue
+                stores = self.stores_from_json(payload)
+                if len(stores) > len(best):
+                    best = stores
+                break
+        return best
+    
+    def stores_from_json(self, payload):
+        """Map the largest list of store-like objects in a JSON payload to store records"""
+        best = []
+        for candidate in self.iter_store_lists(payload):
+            if len(candidate) > len(best):
+                best = candidate
+        
+        stores = []
+        for item in best:
+            store_data = self.store_from_json(item, len(stores) + 1)
+            if store_data['store_name']:
+                stores.append(store_data)
+        return stores
+    
+    def iter_store_lists(self, node):
+        """Yield every list in a JSON tree whose items look like store locations"""
+        if isinstance(node, dict):
+            # JSON-LD often wraps a single store in an object of its own
+            if self.looks_like_store(node):
+                yield [node]
+            for value in node.values():
+                yield from self.iter_store_lists(value)
+        elif isinstance(node, list):
+            stores = [item for item in node if isinstance(item, dict) and self.looks_like_store(item)]
+            if stores:
+                yield stores
+            for item in node:
+                if isinstance(item, (dict, list)):
+                    yield from self.iter_store_lists(item)
+    
+    def looks_like_store(self, item):
+        """True for a store object: a name, a street address and either a store schema type or store-only fields"""
+        has_name = any(item.get(key) for key in ('name', 'storeName', 'locationName'))
+        address = item.get('address')
+        if isinstance(address, dict):
+            has_street = any(address.get(key) for key in ('streetAddress', 'addr1', 'address1', 'street'))
+        else:
+            has_street = bool(address) or any(item.get(key) for key in ('addr1', 'streetAddress', 'address1'))
+        if not (has_name and has_street):
+            return False
         
-        print(f"Data saved to {filename}")
+        # A company's JSON-LD Organization block also has a name and an address
+        ld_type = item.get('@type')
+        if ld_type is not None:
+            ld_types = ld_type if isinstance(ld_type, list) else [ld_type]
+            return any(value in STORE_LD_TYPES for value in ld_types)
+        return any(key in item for key in STORE_ID_KEYS) and any(key in item for key in STORE_DETAIL_KEYS)
     
-    def save_to_json(self, filename='bestbuy_stores.json'):
-        """Save scraped data to JSON file"""
-        if not self.scraped_data:
-            print("No data to save")
-            return
+    def store_from_json(self, item, store_number):
+        """Convert one store object from the locator JSON into the scraper's record layout"""
+        def first(source, *keys):
+            for key in keys:
+                value = source.get(key)
+                if value not in (None, ''):
+                    return value
+            return ''
+        
+        address = item.get('address')
+        address_source = address if isinstance(address, dict) else item
+        street = first(address_source, 'streetAddress', 'addr1', 'address1', 'street')
+        if not street and isinstance(address, str):
+            street = address
+        # Suite or unit line, e.g. "Number 64"; the store cards show it as a second street line
+        street2 = first(address_source, 'streetAddress2', 'addr2', 'address2')
+        city = first(address_source, 'addressLocality', 'city')
+        state = first(address_source, 'addressRegion', 'state', 'region')
+        zipcode = first(address_source, 'postalCode', 'zipCode', 'zip', 'postal')
+        state_zip = ' '.join(str(part) for part in (state, zipcode) if part)
         
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(self.scraped_data, jsonfile, indent=2, ensure_ascii=False)
+        distance = first(item, 'distance', 'distanceInMiles')
+        if isinstance(distance, (int, float)):
+            distance = f"{distance} miles away"
         
-        print(f"Data saved to {filename}")
+        hours = first(item, 'hoursToday', 'todayHours', 'openingHours', 'hours')
+        if isinstance(hours, list):
+            hours = '; '.join(str(part) for part in hours)
+        elif isinstance(hours, dict):
+            hours = '; '.join(f"{day}: {value}" for day, value in hours.items())
+        
+        store_id = first(item, 'id', 'storeId', 'locationId')
+        link = first(item, 'url', 'detailsUrl', 'storeDetailsUrl')
+        if not link and store_id:
+            link = f"https://stores.bestbuy.com/{store_id}"
+        
+        return {
+            'store_number': store_number,
+            'store_name': str(first(item, 'name', 'storeName', 'locationName')),
+            'address': ', '.join(str(part) for part in (street, street2, city, state_zip) if part),
+            'hours': str(hours),
+            'distance': str(distance),
+            'phone': str(first(item, 'phone', 'telephone', 'phoneNumber')),
+            'store_details_link': str(link)
+        }
+    
+    def save_to_csv(self, filename='bestbuy_stores.csv'):
+        """Save scraped data to CSV file"""
+        save_stores_to_csv(self.scraped_data, filename)
+    
+    def save_to_json(self, filename='bestbuy_stores.json'):
+        """Save scraped data to JSON file"""
+        save_stores_to_json(self.scraped_data, filename)
     
     def take_screenshot(self, filename='bestbuy_page.png'):
         """Take a screenshot for debugging"""
@@ -357,18 +832,35 @@ class BestBuyStoreLocatorScraper:
             print(f"Failed to take screenshot: {e}")
     
     def close(self):
-        """Close the WebDriver"""
-        if self.driver:
+        """Close the WebDriver and the HTTP transport"""
+        if self.driver and self.owns_driver:
             self.driver.quit()
             print("WebDriver closed")
+        self.driver = None
+        if self.transport:
+            self.transport.close()
     
     def scrape_stores(self, zipcode="10001", take_screenshot=False):
         """Main method to scrape Best Buy stores"""
         try:
             print("=== Best Buy Store Locator Scraper ===")
+            stores = []
             
-            # Search for stores
-            if self.search_stores_by_zipcode(zipcode):
+            if self.browserless:
+                stores = self.fetch_stores_via_http(zipcode)
+                if not stores:
+                    print("Browserless lookup found no stores, falling back to Selenium")
+            
+            if not stores:
+                self.used_browser = True
+                if self.driver is None:
+                    self.setup_driver(self.headless)
+                    self.owns_driver = True
+                
+                # Search for stores
+                if not self.search_stores_by_zipcode(zipcode):
+                    print("Failed to search for stores")
+                    return []
                 
                 # Take screenshot if requested
                 if take_screenshot:
@@ -376,30 +868,28 @@ class BestBuyStoreLocatorScraper:
                 
                 # Extract store data
                 stores = self.extract_store_data()
+            
+            if stores:
+                self.metrics.inc('scraper_records_total', len(stores), site='bestbuy')
+                print(f"\n=== Successfully extracted {len(stores)} stores ===")
                 
-                if stores:
-                    print(f"\n=== Successfully extracted {len(stores)} stores ===")
-                    
-                    # Display results
-                    for i, store in enumerate(stores, 1):
-                        print(f"\nStore {i}:")
-                        print(f"  Name: {store['store_name']}")
-                        print(f"  Address: {store['address']}")
-                        print(f"  Hours: {store['hours']}")
-                        print(f"  Distance: {store['distance']}")
-                        if store['phone']:
-                            print(f"  Phone: {store['phone']}")
-                    
-                    # Save data
-                    self.save_to_csv()
-                    self.save_to_json()
-                    
-                    return stores
-                else:
-                    print("No store data extracted")
-                    return []
+                # Display results
+                for i, store in enumerate(stores, 1):
+                    print(f"\nStore {i}:")
+                    print(f"  Name: {store['store_name']}")
+                    print(f"  Address: {store['address']}")
+                    print(f"  Hours: {store['hours']}")
+                    print(f"  Distance: {store['distance']}")
+                    if store['phone']:
+                        print(f"  Phone: {store['phone']}")
+                
+                # Save data
+                self.save_to_csv()
+                self.save_to_json()
+                
+                return stores
             else:
-                print("Failed to search for stores")
+                print("No store data extracted")
                 return []
                 
         except Exception as e:
@@ -408,10 +898,200 @@ class BestBuyStoreLocatorScraper:
         finally:
             self.close()
 
+class WebDriverPool:
+    def __init__(self, size=2, headless=True, max_uses=20, lean=True):
+        """Fixed-size pool of long-lived Chrome drivers, recycled after max_uses jobs or a crash"""
+        self.size = size
+        self.headless = headless
+        self.lean = lean
+        self.max_uses = max_uses
+        self.idle = queue.Queue()
+        # Bounds live browsers (checked out plus idle) to the pool size
+        self.slots = threading.Semaphore(size)
+        self.lock = threading.Lock()
+        self.stats = {'started': 0, 'recycled': 0, 'crashed': 0}
+    
+    def acquire(self):
+        """Check out an idle driver, starting a new one if the pool has room"""
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        try:
+            driver = create_driver(self.headless, self.lean)
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.stats['started'] += 1
+        return {'driver': driver, 'uses': 0}
+    
+    def release(self, entry):
+        """Reset a driver and return it to the pool, or retire it when worn out or broken"""
+        entry['uses'] += 1
+        keep = entry['uses'] < self.max_uses
+        if keep:
+            try:
+                reset_driver(entry['driver'])
+            except Exception as e:
+                print(f"Driver failed to reset, replacing it: {e}")
+                keep = False
+                with self.lock:
+                    self.stats['crashed'] += 1
+        else:
+            with self.lock:
+                self.stats['recycled'] += 1
+        
+        if keep:
+            self.idle.put(entry)
+        else:
+            self.quit(entry)
+        self.slots.release()
+        return keep
+    
+    def discard(self, entry):
+        """Retire a driver whose browser crashed mid-job, freeing its slot for a fresh one"""
+        with self.lock:
+            self.stats['crashed'] += 1
+        self.quit(entry)
+        self.slots.release()
+    
+    def quit(self, entry):
+        try:
+            entry['driver'].quit()
+        except Exception:
+            pass
+    
+    def close(self):
+        """Quit every idle driver"""
+        while True:
+            try:
+                self.quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
+    
+    def summary(self):
+        return (f"driver pool: {self.stats['started']} browsers started for {self.size} slots, "
+                f"{self.stats['recycled']} recycled after {self.max_uses} uses, {self.stats['crashed']} crashed")
+
+class BestBuyBatchScraper:
+    def __init__(self, pool_size=2, headless=True, max_uses=20, browserless=False, lean=True, archive=None, metrics=None,
+                 api_url=None):
+        """Look up many ZIP codes across a fixed pool of reusable headless browsers"""
+        self.pool = WebDriverPool(size=pool_size, headless=headless, max_uses=max_uses, lean=lean)
+        self.pool_size = pool_size
+        self.headless = headless
+        self.browserless = browserless
+        self.api_url = api_url
+        self.archive = archive
+        # One Metrics shared by every per-ZIP scraper
+        self.metrics = metrics or Metrics()
+        self.scraped_data = []
+    
+    def scrape_zipcode(self, zipcode, attempts=2):
+        """Look up one ZIP code, over HTTP first in browserless mode, then on a pooled driver"""
+        if self.browserless:
+            http_scraper = BestBuyStoreLocatorScraper(browserless=True, archive=self.archive, metrics=self.metrics,
+                                                      api_url=self.api_url)
+            try:
+                stores = http_scraper.fetch_stores_via_http(zipcode)
+            finally:
+                http_scraper.close()
+            if stores:
+                return stores
+        
+        for attempt in range(attempts):
+            try:
+                entry = self.pool.acquire()
+            except Exception as e:
+                # Chrome or chromedriver failed to start; this ZIP may still get a browser on the next attempt
+                print(f"Could not start a driver for ZIP {zipcode}: {e}")
+                healthy = False
+            else:
+                scraper = BestBuyStoreLocatorScraper(headless=self.headless, driver=entry['driver'], archive=self.archive,
+                                                     metrics=self.metrics)
+                stores = []
+                try:
+                    if scraper.search_stores_by_zipcode(zipcode):
+                        stores = scraper.extract_store_data()
+                except WebDriverException as e:
+                    # The browser died under this job; one ZIP must not take the whole batch down
+                    print(f"Driver crashed on ZIP {zipcode}: {e}")
+                    self.pool.discard(entry)
+                    healthy = False
+                else:
+                    healthy = self.pool.release(entry)
+                
+                # A failed search on a driver that then failed to reset means the browser crashed
+                if stores or healthy:
+                    return stores
+            if attempt + 1 < attempts:
+                print(f"Retrying ZIP {zipcode} on a fresh driver")
+        print(f"Giving up on ZIP {zipcode} after {attempts} attempts")
+        return []
+    
+    def scrape_zipcodes(self, zipcodes):
+        """Scrape every ZIP code and merge the stores, deduplicated by store_details_link"""
+        print(f"=== Best Buy batch lookup: {len(zipcodes)} ZIP codes on {self.pool_size} drivers ===")
+        started = time.monotonic()
+        merged = []
+        seen = set()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+                results = executor.map(self.scrape_zipcode, zipcodes)
+                for zipcode, stores in zip(zipcodes, results):
+                    print(f"ZIP {zipcode}: {len(stores)} stores")
+                    for store in stores:
+                        key = store['store_details_link'] or (store['store_name'], store['address'])
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        merged.append(dict(store, store_number=len(merged) + 1))
+                        self.metrics.inc('scraper_records_total', site='bestbuy')
+        finally:
+            self.pool.close()
+        
+        print(f"\n=== {len(merged)} unique stores from {len(zipcodes)} ZIP codes in {time.monotonic() - started:.1f}s ===")
+        print(self.pool.summary())
+        print(self.metrics.summary())
+        self.scraped_data = merged
+        return merged
+    
+    def save_to_csv(self, filename='bestbuy_stores.csv'):
+        save_stores_to_csv(self.scraped_data, filename)
+    
+    def save_to_json(self, filename='bestbuy_stores.json'):
+        save_stores_to_json(self.scraped_data, filename)
+
 # Usage example
 if __name__ == "__main__":
-    # Initialize scraper (set headless=False to see the browser)
-    scraper = BestBuyStoreLocatorScraper(headless=False)
+    if sys.argv[1:] == ['--compare-profiles']:
+        # Before/after report for the lean browser profile
+        compare_profiles()
+        sys.exit(0)
+    
+    # --capture archives every response and rendered page to bestbuy_capture.warc.gz
+    archive = ArchiveWriter('bestbuy_capture.warc.gz') if '--capture' in sys.argv else None
+    zipcodes = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    
+    if zipcodes:
+        # Batch mode: python bonus.py 10001 10002 ... runs the ZIPs across a pool of headless drivers
+        batch = BestBuyBatchScraper(pool_size=2, headless=True, browserless=True, archive=archive)
+        batch.scrape_zipcodes(zipcodes)
+        batch.save_to_csv()
+        batch.save_to_json()
+        batch.metrics.write_json('bestbuy_metrics.json')
+        batch.metrics.write_prometheus('bestbuy_metrics.prom')
+        if archive is not None:
+            archive.close()
+        sys.exit(0)
+    
+    # Initialize scraper: try the plain-HTTP lookup first and only open a
+    # browser if it finds nothing (set headless=False to see that browser)
+    scraper = BestBuyStoreLocatorScraper(headless=False, browserless=True, archive=archive)
     
     try:
         # Scrape stores for zip code 10001
@@ -422,11 +1102,18 @@ if __name__ == "__main__":
         print(f"Files saved:")
         print(f"  - bestbuy_stores.csv")
         print(f"  - bestbuy_stores.json")
-        print(f"  - bestbuy_page.png (screenshot)")
+        if scraper.used_browser:
+            print(f"  - bestbuy_page.png (screenshot)")
+        
+        print(scraper.metrics.summary())
+        scraper.metrics.write_json('bestbuy_metrics.json')
+        scraper.metrics.write_prometheus('bestbuy_metrics.prom')
         
     except Exception as e:
         print(f"Script failed: {e}")
     
     finally:
         # Ensure driver is closed
-        scraper.close()
\ No newline at end of file
+        scraper.close()
+        if archive is not None:
+            archive.close()
@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+
+def normalize_detail_url(url):
+    """Reduce a detail URL to host and path, dropping the search context in its query string"""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') + '/'
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}"
+
+
+class CheckpointLog:
+    def __init__(self, path='earth911_checkpoint.jsonl'):
+        """Append-only JSON Lines log of finished detail URLs and their records"""
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = {}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A crash mid-write can leave a torn last line; that URL is simply redone
+                        continue
+                    self.records[entry['url']] = entry['record']
+            print(f"Resuming from checkpoint {path}: {len(self.records)} detail pages already done")
+
+        self.file = open(path, 'a', encoding='utf-8')
+        # Terminate a torn last line so the next record starts on a line of its own
+        if self.file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.file.write('\n')
+
+    def __contains__(self, url):
+        return url in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, url):
+        """Return the checkpointed record for a URL, or None if it still needs scraping"""
+        return self.records.get(url)
+
+    def record(self, url, data):
+        """Durably append one finished URL and its record"""
+        line = json.dumps({'url': url, 'record': data}, ensure_ascii=False)
+        with self.lock:
+            self.records[url] = data
+            self.file.write(line + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def clear(self):
+        """Delete the log once a crawl has finished and its results are saved"""
+        self.close()
+        self.records = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
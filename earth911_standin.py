@@ -0,0 +1,414 @@
+import argparse
+import contextlib
+import gzip
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import tracemalloc
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+# Generated detail URLs are /location/<ID_BASE + index>/ and /program/<ID_BASE + index>/
+ID_BASE = 49250000
+STATS_PATH = '/__standin/stats'
+
+MATERIALS = [
+    'Air Conditioners', 'Batteries', 'CD & DVD Cases', 'Cell Phone Accessories', 'Cell Phones', 'Computer Monitors',
+    'Desktop Computers', 'Digital Cameras', 'DVD Players', 'E-Readers', 'Fax Machines', 'Flat Panel TVs',
+    'Game Consoles', 'GPS Devices', 'Hard Drives', 'Inkjet Cartridges', 'Keyboards', 'Laptop Computers',
+    'LCD Televisions', 'MP3 Players', 'Printers', 'Rechargeable Batteries', 'Routers', 'Scanners', 'Servers',
+    'Tablets', 'Toner Cartridges', 'VCRs', 'Video Cameras', 'Wires & Cords'
+]
+NAME_PARTS = (
+    ['Green', 'Metro', 'City', 'Eco', 'Urban', 'Tri-State', 'Hudson', 'Empire', 'Liberty', 'Harbor'],
+    ['Recycling', 'E-Waste', 'Electronics Recovery', 'Tech Recyclers', 'Drop-Off Center', 'Collection Site']
+)
+STREETS = ['7th Ave', 'Broadway', 'W 34th St', 'Lexington Ave', 'Atlantic Ave', 'Dorigo Lane', 'Main St', 'Park Ave']
+CITIES = [
+    ('New York', 'NY', '10001'), ('Brooklyn', 'NY', '11201'), ('Jersey City', 'NJ', '07302'),
+    ('Secaucus', 'NJ', '07094'), ('Hoboken', 'NJ', '07030'), ('Yonkers', 'NY', '10701')
+]
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+          'November', 'December']
+
+# Site navigation and footer, so generated pages carry roughly the markup the real ones do around the results
+SITE_CHROME = ''.join(
+    f'<li class="menu-item"><a href="/category/{category}/">Recycling Category {category}</a><ul class="sub-menu">'
+    + ''.join(f'<li><a href="/how-to-recycle/{category}-{item}/">How to recycle item {category}-{item}</a></li>'
+              for item in range(8))
+    + '</ul></li>'
+    for category in range(12)
+)
+
+
+def generate_listing(index, seed=0):
+    """The same Earth911-shaped listing for a given index and seed, every time it is asked for"""
+    rng = random.Random(seed * 1000003 + index)
+    # About one in seven results is an area-wide program: no street address, like curbside pickup
+    kind = 'program' if index % 7 == 0 else 'location'
+    city, state, zip_code = CITIES[index % len(CITIES)]
+    return {
+        'index': index,
+        'kind': kind,
+        'path': f"/{kind}/{ID_BASE + index}/",
+        'name': f"{rng.choice(NAME_PARTS[0])} {rng.choice(NAME_PARTS[1])} #{index}",
+        'street': '' if kind == 'program' else f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+        'city_state_zip': f"{city}, {state} {zip_code}",
+        'updated': f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2010, 2024)}",
+        'materials': sorted(rng.sample(MATERIALS, rng.randint(2, 12)))
+    }
+
+
+def page_shell(title, content):
+    return (f'<!DOCTYPE html><html><head><title>{escape(title)} | Earth911</title></head><body>'
+            f'<div id="header"><ul class="menu">{SITE_CHROME}</ul></div>'
+            f'<div id="content">{content}</div>'
+            f'<div id="footer"><p>&copy; Earth911 stand-in</p></div></body></html>')
+
+
+def render_search_page(query, page, listings, per_page, seed=0):
+    """Search results page `page` (from 1) for a stand-in holding `listings` results"""
+    first = (page - 1) * per_page
+    last = min(first + per_page, listings)
+    context = urlencode({key: query[key] for key in ('what', 'where', 'max_distance') if key in query})
+    items = []
+    for index in range(first, last):
+        listing = generate_listing(index, seed)
+        materials = ''.join(
+            f'<span class="{"matched material" if position == 0 else "material"} no-link">{escape(material)}</span>, '
+            for position, material in enumerate(listing['materials'])
+        )
+        items.append(
+            f'<li class="result-item {listing["kind"]} {"odd" if index % 2 == 0 else "even"}"><div class="description">'
+            f'<h2 class="title"><a href="{listing["path"]}?{escape(context)}">{escape(listing["name"])}</a></h2>'
+            f'<p class="contact"><span class="address1">{escape(listing["street"])}</span> '
+            f'<span class="address3">{escape(listing["city_state_zip"])}</span></p>'
+            f'<p class="result-materials"><span class="material-label">Materials accepted: </span>{materials}</p>'
+            f'<span class="last-verified">Updated {listing["updated"]}</span></div></li>'
+        )
+
+    pager = f'<span class="current">{page}</span>'
+    if last < listings:
+        next_query = escape(urlencode(dict(query, page=page + 1)))
+        pager += f' <a class="next" href="?{next_query}">Next</a>'
+    shown = f"Showing {first + 1}-{last} of {listings} results" if first < last else "No results"
+    return page_shell('Search', f'<div class="results"><p class="result-count">{shown}</p>'
+                                f'<ul class="result-list">{"".join(items)}</ul><div class="pager">{pager}</div></div>')
+
+
+def render_detail_page(listing):
+    rows = ''.join(
+        f'<tr class="{"even" if position % 2 == 0 else "odd"}"><td class="material-name"><span>{escape(material)}</span></td>'
+        f'<td class="material-notes">Drop-off</td><td class="material-fee">Free</td></tr>'
+        for position, material in enumerate(listing['materials'])
+    )
+    address = ''.join(f'<p class="addr">{escape(line)}</p>' for line in (listing['street'], listing['city_state_zip']) if line)
+    return page_shell(listing['name'], (
+        f'<div class="masthead"><h1 class="back-to">{escape(listing["name"])}'
+        f'<span class="last-verified">Updated {listing["updated"]}</span></h1>'
+        f'<div class="contact">{address}<p class="phone">(212) 555-{listing["index"] % 10000:04d}</p></div></div>'
+        f'<table class="materials-accepted"><tr class="label"><th>Material</th><th>Notes</th><th>Fee</th></tr>{rows}</table>'
+    ))
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the scraper's connection pool behaves as it does against the real site
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # One access log line per request would drown out the load-test report
+        pass
+
+    def do_GET(self):
+        self.server.standin.respond(self)
+
+
+class Earth911Standin:
+    def __init__(self, listings=1000, per_page=10, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, seed=0, host='127.0.0.1', port=0):
+        """Local HTTP server generating paginated Earth911-shaped search and detail pages for any listing count"""
+        self.listings = listings
+        self.per_page = per_page
+        # Seconds added to every response, plus up to `jitter` more at random
+        self.latency = latency
+        self.jitter = jitter
+        # Fractions of requests answered with a 500, or a 429 carrying Retry-After
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.host = host
+        self.port = port
+        self.base_url = None
+        self.httpd = None
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.stats = {'search': 0, 'detail': 0, 'errors': 0, 'throttled': 0, 'not_found': 0, 'bytes': 0}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Serve on a background thread; base_url is set once the port is bound"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), StandinRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://{self.host}:{self.port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.random()
+
+    def respond(self, handler):
+        url = urlparse(handler.path)
+        if url.path == STATS_PATH:
+            with self.lock:
+                body = json.dumps(self.stats)
+            return self.send(handler, 200, body, 'application/json')
+
+        fault, jitter = self.draw()
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * jitter)
+        if fault < self.throttle_rate:
+            self.count('throttled')
+            return self.send(handler, 429, 'Too Many Requests', 'text/plain', {'Retry-After': str(self.retry_after)})
+        if fault < self.throttle_rate + self.error_rate:
+            self.count('errors')
+            return self.send(handler, 500, 'Internal Server Error', 'text/plain')
+
+        parts = url.path.strip('/').split('/')
+        if url.path in ('', '/'):
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                page = max(1, int(query.pop('page', 1)))
+            except ValueError:
+                page = 1
+            self.count('search')
+            return self.send(handler, 200, render_search_page(query, page, self.listings, self.per_page, self.seed))
+
+        if len(parts) == 2 and parts[0] in ('location', 'program') and parts[1].isdigit():
+            index = int(parts[1]) - ID_BASE
+            if 0 <= index < self.listings:
+                listing = generate_listing(index, self.seed)
+                if listing['kind'] == parts[0]:
+                    self.count('detail')
+                    return self.send(handler, 200, render_detail_page(listing))
+
+        self.count('not_found')
+        return self.send(handler, 404, 'Not Found', 'text/plain')
+
+    def send(self, handler, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8')
+        handler.send_response(status)
+        # Compressed like earth911.com, so the transport's decoding is part of what gets measured
+        if len(data) > 1024 and 'gzip' in handler.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data, compresslevel=5)
+            handler.send_header('Content-Encoding', 'gzip')
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+        self.count('bytes', len(data))
+
+
+def _serve(options, ready):
+    standin = Earth911Standin(**options).start()
+    ready.put(standin.base_url)
+    threading.Event().wait()
+
+
+def serve_in_subprocess(**options):
+    """Start a stand-in in its own process, so serving pages does not compete with the scraper for the GIL"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(options, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def fetch_stats(base_url):
+    with urlopen(base_url + STATS_PATH, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def current_rss():
+    """Resident memory of this process in bytes, or None where it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    def __init__(self, interval=0.05):
+        """Background thread tracking this process's peak resident memory while a crawl runs"""
+        self.interval = interval
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = current_rss()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+def load_test_once(base_url, listings, mode='pipeline', max_workers=8, requests_per_second=500.0, trace_memory=False):
+    """Crawl one stand-in end to end and measure throughput and memory"""
+    # main pulls in BeautifulSoup and the HTTP transports, which only the load test needs
+    from main import Earth911Scraper
+
+    scraper = Earth911Scraper(base_url=base_url, keep_in_memory=False, requests_per_second=requests_per_second)
+    search_url = scraper.build_search_url('Electronics', '10001')
+
+    if trace_memory:
+        tracemalloc.start()
+    sampler = MemorySampler().start()
+    started = time.perf_counter()
+    # The scraper logs every page and record; at 100k listings printing them would be most of the work
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if mode == 'listing-only':
+            scraper.scrape_listings(search_url, max_workers=max_workers, requests_per_second=requests_per_second)
+        elif mode == 'all-pages':
+            scraper.scrape_all_pages(search_url, max_workers=max_workers, requests_per_second=requests_per_second)
+        else:
+            scraper.scrape_pipeline(search_url, max_workers=max_workers, requests_per_second=requests_per_second)
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    retries = sum(value for (name, _), value in scraper.metrics.counters.items() if name == 'scraper_fetch_retries_total')
+    scraper.close()
+
+    served = fetch_stats(base_url)
+    requests = served['search'] + served['detail'] + served['errors'] + served['throttled']
+    mib = 1024 * 1024
+    return {
+        'listings': listings,
+        'mode': mode,
+        'records': scraper.records_emitted,
+        'seconds': elapsed,
+        'records_per_sec': scraper.records_emitted / elapsed if elapsed else 0.0,
+        'requests': requests,
+        'requests_per_sec': requests / elapsed if elapsed else 0.0,
+        'retries': retries,
+        'served_errors': served['errors'],
+        'served_throttled': served['throttled'],
+        'rss_peak_mib': sampler.peak_rss / mib if sampler.peak_rss else None,
+        'rss_growth_mib': (sampler.peak_rss - sampler.start_rss) / mib if sampler.peak_rss else None,
+        'traced_peak_mib': traced_peak / mib if traced_peak is not None else None
+    }
+
+
+def run_load_test(listing_counts=(100, 1000, 10000, 100000), mode='pipeline', max_workers=8,
+                  requests_per_second=500.0, trace_memory=False, **server_options):
+    """Crawl a fresh stand-in for each listing count and report how throughput and memory scale"""
+    results = []
+    for listings in listing_counts:
+        process, base_url = serve_in_subprocess(listings=listings, **server_options)
+        print(f"Crawling {listings} listings from {base_url} ({mode}, {max_workers} workers)...")
+        try:
+            results.append(load_test_once(base_url, listings, mode, max_workers, requests_per_second, trace_memory))
+        finally:
+            process.terminate()
+            process.join()
+        print_load_test_results(results[-1:], header=len(results) == 1)
+    return results
+
+
+def print_load_test_results(results, header=True):
+    def mib(value):
+        return f"{value:.1f}" if value is not None else '-'
+
+    if header:
+        print(f"{'listings':>9} {'records':>8} {'seconds':>8} {'records/s':>10} {'requests':>9} {'req/s':>8} "
+              f"{'retries':>8} {'429/5xx':>8} {'RSS peak MiB':>13} {'RSS growth':>11} {'traced MiB':>11}")
+    for row in results:
+        print(f"{row['listings']:>9} {row['records']:>8} {row['seconds']:>8.1f} {row['records_per_sec']:>10.1f} "
+              f"{row['requests']:>9} {row['requests_per_sec']:>8.1f} {row['retries']:>8} "
+              f"{row['served_throttled'] + row['served_errors']:>8} {mib(row['rss_peak_mib']):>13} "
+              f"{mib(row['rss_growth_mib']):>11} {mib(row['traced_peak_mib']):>11}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Synthetic Earth911 stand-in server and scraper load test")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="Serve generated pages until interrupted")
+    load_parser = commands.add_parser('loadtest', help="Crawl stand-ins of growing size and report throughput and memory")
+
+    for parser in (serve_parser, load_parser):
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many more seconds, at random")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction answered with HTTP 429")
+        parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with each 429")
+        parser.add_argument('--seed', type=int, default=0)
+    serve_parser.add_argument('--listings', type=int, default=1000)
+    serve_parser.add_argument('--port', type=int, default=8911)
+    load_parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    load_parser.add_argument('--mode', choices=['pipeline', 'all-pages', 'listing-only'], default='pipeline')
+    load_parser.add_argument('--workers', type=int, default=8)
+    load_parser.add_argument('--requests-per-second', type=float, default=500.0)
+    load_parser.add_argument('--tracemalloc', action='store_true', help="Also report Python heap peak (slows the crawl)")
+    load_parser.add_argument('--json', help="Write the results to this file")
+    args = arg_parser.parse_args()
+
+    options = {
+        'per_page': args.per_page, 'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+        'throttle_rate': args.throttle_rate, 'retry_after': args.retry_after, 'seed': args.seed
+    }
+    if args.command == 'serve':
+        with Earth911Standin(listings=args.listings, port=args.port, **options) as standin:
+            print(f"Serving {args.listings} listings at {standin.base_url} "
+                  f"(point Earth911Scraper(base_url=...) or `python main.py --base-url` here; Ctrl+C to stop)")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+    else:
+        results = run_load_test(args.counts, args.mode, args.workers, args.requests_per_second, args.tracemalloc, **options)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results saved to {args.json}")
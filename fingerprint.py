@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+# Bump when the extractors change so records parsed by older code are not reused
+EXTRACTOR_VERSION = 1
+
+# Parts of a page that change between requests without changing the record
+VOLATILE_PATTERN = re.compile(r'<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->|<input[^>]*>', re.S | re.I)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def content_fingerprint(content):
+    """Hash of a page body with scripts, styles, comments, form inputs and whitespace runs removed"""
+    normalized = WHITESPACE_PATTERN.sub(' ', VOLATILE_PATTERN.sub('', content))
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16)
+    digest.update(str(EXTRACTOR_VERSION).encode('ascii'))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, path='earth911_parsed.json'):
+        """Extracted records keyed by detail URL, each stored with the fingerprint of the page it came from"""
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable parse cache {path}: {e}")
+
+    def lookup(self, url, fingerprint):
+        """Return the stored record if the page still hashes the same, otherwise None"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry and entry['fingerprint'] == fingerprint:
+                self.stats['hits'] += 1
+                return entry['record']
+            self.stats['misses'] += 1
+            return None
+
+    def store(self, url, fingerprint, record):
+        with self.lock:
+            self.entries[url] = {'fingerprint': fingerprint, 'record': record}
+
+    def save(self):
+        """Write the cache atomically so a crash mid-save keeps the previous file"""
+        with self.lock:
+            data = json.dumps(self.entries, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        return (f"parse cache: {self.stats['hits']} unchanged pages reused, {self.stats['misses']} parsed "
+                f"({rate:.0f}% hit rate), {len(self.entries)} fingerprints stored")
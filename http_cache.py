@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    def __init__(self, cache_dir='.http_cache', ttl=12 * 60 * 60, max_bytes=200 * 1024 * 1024):
+        """On-disk cache of page bodies keyed by URL, with TTL and size-based LRU eviction"""
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'fresh_hits': 0, 'revalidated': 0, 'misses': 0, 'evictions': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # key -> [size_on_disk, last_access]; built once so eviction never rescans the directory
+        self.index = {}
+        self.total_bytes = 0
+        for name in os.listdir(cache_dir):
+            if name.endswith('.json'):
+                key = name[:-len('.json')]
+                size = self._entry_size(key)
+                self.index[key] = [size, os.path.getmtime(self._meta_path(key))]
+                self.total_bytes += size
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.html.gz")
+
+    def _entry_size(self, key):
+        size = 0
+        for path in (self._meta_path(key), self._body_path(key)):
+            if os.path.exists(path):
+                size += os.path.getsize(path)
+        return size
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """Return the cached entry for a URL (metadata plus decoded body), or None"""
+        key = self._key(url)
+        try:
+            with open(self._meta_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with gzip.open(self._body_path(key), 'rb') as f:
+                entry['body'] = f.read().decode('utf-8')
+        except (OSError, ValueError):
+            return None
+
+        with self.lock:
+            if key in self.index:
+                self.index[key][1] = time.time()
+        return entry
+
+    def is_fresh(self, entry):
+        """True while an entry is younger than the TTL and can be served without a request"""
+        return time.time() - entry.get('stored_at', 0) < self.ttl
+
+    def conditional_headers(self, entry):
+        """Build If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Write a compressed body and its validators, then evict down to max_bytes"""
+        key = self._key(url)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time()
+        }
+        self._write_atomic(self._body_path(key), gzip.compress(body.encode('utf-8')))
+        self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+        self._track(key)
+        self.evict()
+
+    def refresh(self, url, entry):
+        """Restart the TTL of an entry after the server answered 304 Not Modified"""
+        key = self._key(url)
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['stored_at'] = time.time()
+        self._write_atomic(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+        self._track(key)
+
+    def _track(self, key):
+        size = self._entry_size(key)
+        with self.lock:
+            old_size = self.index.get(key, [0, 0])[0]
+            self.index[key] = [size, time.time()]
+            self.total_bytes += size - old_size
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        if not self.max_bytes:
+            return
+
+        with self.lock:
+            if self.total_bytes <= self.max_bytes:
+                return
+            victims = sorted(self.index.items(), key=lambda item: item[1][1])
+            for key, (size, _) in victims:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                for path in (self._meta_path(key), self._body_path(key)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                del self.index[key]
+                self.total_bytes -= size
+                self.stats['evictions'] += 1
+
+    def count(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def summary(self):
+        return (f"cache: {self.stats['fresh_hits']} fresh hits, {self.stats['revalidated']} revalidated (304), "
+                f"{self.stats['misses']} misses, {self.stats['evictions']} evictions, "
+                f"{len(self.index)} entries / {self.total_bytes / 1024:.1f} KiB on disk")
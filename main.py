@@ -1,35 +1,174 @@
-import requests
-from bs4 import BeautifulSoup
 import time
-import csv
 import json
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlencode
 import re
+import sys
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import queue
+import threading
+from rate_limit import AdaptiveRateLimiter, backoff_delay, parse_retry_after
+from http_cache import ResponseCache
+from parsing import class_strainer, make_soup
+from checkpoint import CheckpointLog, normalize_detail_url
+from fingerprint import ParseCache, content_fingerprint
+from archive import ArchiveWriter
+from metrics import Metrics, profile_run
+from records import Earth911Record
+from recycling_store import RecyclingStoreSink
+from transport import RequestsTransport, TransportError
+from sinks import EARTH911_FIELDS, CsvRecordSink, JsonArrayRecordSink, JsonLinesRecordSink
+
+# Partial parsing only builds the subtrees the extractors read
+SEARCH_PAGE_STRAINER = class_strainer('result-item', 'pager')
+DETAIL_PAGE_STRAINER = class_strainer('back-to', 'title', 'masthead', 'materials-accepted', 'result-materials')
+
+class StageStats:
+    def __init__(self, name):
+        """Item, queue-depth and throughput counters for one pipeline stage"""
+        self.name = name
+        self.items = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.started = time.monotonic()
+        self.last_item_at = None
+        self.lock = threading.Lock()
+    
+    def record(self, queue_depth):
+        """Count one item handed on by this stage and the depth of its output queue"""
+        with self.lock:
+            self.items += 1
+            self.queue_depth = queue_depth
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self.last_item_at = time.monotonic()
+    
+    def throughput(self):
+        """Items per second from pipeline start to this stage's last item"""
+        elapsed = (self.last_item_at or time.monotonic()) - self.started
+        return self.items / elapsed if elapsed > 0 else 0.0
+    
+    def summary(self):
+        return (f"{self.name}: {self.items} items, {self.throughput():.2f} items/s, "
+                f"queue depth {self.queue_depth} (max {self.max_queue_depth})")
 
 class Earth911Scraper:
-    def __init__(self):
-        self.base_url = "https://search.earth911.com"
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, base_url="https://search.earth911.com", cache=None, parser=None, partial_parse=True, parse_workers=0, checkpoint=None,
+                 sinks=None, keep_in_memory=True, requests_per_second=2.0, transport=None, parse_cache=None, archive=None,
+                 metrics=None):
+        self.base_url = base_url
+        # HTTP client behind get_page_content; transport.HttpxTransport is a drop-in alternative
+        self.transport = transport or RequestsTransport(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.scraped_data = []
+        # Streaming writers (sinks.CsvRecordSink etc.) receive each record as it is produced;
+        # with keep_in_memory=False nothing accumulates in scraped_data
+        self.sinks = sinks or []
+        self.keep_in_memory = keep_in_memory
+        self.records_emitted = 0
+        # Shared per-host token bucket; it adapts from requests_per_second to what the server tolerates
+        self.rate_limiter = AdaptiveRateLimiter(initial_rate=requests_per_second)
+        self.pipeline_stats = {}
+        # Normalized detail URLs already scheduled, shared by every query of a crawl
+        self.seen_detail_urls = set()
+        self.dedup_stats = {'listings': 0, 'unique': 0, 'duplicates': 0}
+        # Optional checkpoint.CheckpointLog; finished detail pages are skipped on restart
+        self.checkpoint = checkpoint
+        # Optional http_cache.ResponseCache shared by search and detail fetches
+        self.cache = cache
+        # Optional fingerprint.ParseCache; detail pages that hash the same as last time are not re-parsed
+        self.parse_cache = parse_cache
+        # Optional archive.ArchiveWriter; every page the crawl reads is captured for offline re-extraction
+        self.archive = archive
+        # Fetch latency, retries, bytes, parse and write times; export with metrics.write_json/write_prometheus
+        self.metrics = metrics or Metrics()
+        # None picks lxml when installed, otherwise html.parser
+        self.parser = parser
+        self.partial_parse = partial_parse
+        # Parsing holds the GIL, so with parse_workers > 0 it runs in separate processes
+        self.parse_pool = None
+        if parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=parse_workers,
+                initializer=_init_parse_worker,
+                initargs=(parser, partial_parse)
+            )
     
     def get_page_content(self, url, retries=3, delay=1):
         """Fetch page content with retry logic"""
+        host = urlparse(url).netloc
+        cached = self.cache.get(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            self.cache.count('fresh_hits')
+            self.metrics.inc('scraper_cache_total', outcome='fresh_hit')
+            self.capture(url, 200, self.cached_headers(cached), cached['body'])
+            return cached['body']
+        
+        # Stale entries are revalidated with a conditional GET
+        headers = self.cache.conditional_headers(cached) if cached else {}
+        
         for attempt in range(retries):
+            retry_after = None
+            if attempt:
+                self.metrics.inc('scraper_fetch_retries_total', host=host)
+            self.rate_limiter.wait(url)
+            started = time.monotonic()
             try:
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                return response.text
-            except requests.RequestException as e:
+                response = self.transport.get(url, headers=headers, timeout=10)
+            except TransportError as e:
+                self.metrics.observe('scraper_fetch_seconds', time.monotonic() - started, host=host, status='error')
                 print(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < retries - 1:
-                    time.sleep(delay * (attempt + 1))
-                else:
-                    print(f"Failed to fetch {url} after {retries} attempts")
-                    return None
+                self.rate_limiter.on_error(url)
+            else:
+                latency = time.monotonic() - started
+                self.metrics.observe('scraper_fetch_seconds', latency, host=host, status=str(response.status_code))
+                self.metrics.inc('scraper_wire_bytes_total', response.wire_bytes, host=host)
+                self.metrics.inc('scraper_decoded_bytes_total', response.decoded_bytes, host=host)
+                if cached and response.status_code == 304:
+                    self.rate_limiter.on_success(url, latency)
+                    self.cache.refresh(url, cached)
+                    self.cache.count('revalidated')
+                    self.metrics.inc('scraper_cache_total', outcome='revalidated')
+                    self.capture(url, 200, self.cached_headers(cached), cached['body'])
+                    return cached['body']
+                if response.status_code < 400:
+                    self.rate_limiter.on_success(url, latency)
+                    if self.cache:
+                        self.cache.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                        self.cache.count('misses')
+                    self.capture(url, response.status_code, response.headers, response.text)
+                    return response.text
+                if response.status_code in (429, 503):
+                    # Throttled: slow the whole host down and honour Retry-After
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    self.rate_limiter.on_throttle(url, retry_after)
+                print(f"Attempt {attempt + 1} failed for {url}: HTTP {response.status_code}")
+            
+            if attempt < retries - 1:
+                # With Retry-After the limiter already holds the host until it expires
+                if retry_after is None:
+                    time.sleep(backoff_delay(attempt, delay))
+        
+        print(f"Failed to fetch {url} after {retries} attempts")
+        return None
+    
+    def capture(self, url, status_code, headers, body):
+        """Write a page to the capture archive, if one is configured"""
+        if self.archive is not None:
+            self.archive.write_response(url, status_code, headers, body)
+    
+    def cached_headers(self, entry):
+        """Validators of a cached page, archived in place of the response headers it was stored from"""
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        if entry.get('etag'):
+            headers['ETag'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['Last-Modified'] = entry['last_modified']
+        return headers
+    
+    def make_soup(self, content, strainer=None):
+        """Parse HTML with the configured backend, restricted to the strainer when partial parsing is on"""
+        return make_soup(content, self.parser, strainer if self.partial_parse else None)
     
     def extract_main_page_links(self, main_url):
         """Extract all href links from the main search results page"""
@@ -39,8 +178,18 @@ class Earth911Scraper:
         if not content:
             return []
         
-        soup = BeautifulSoup(content, 'html.parser')
-        links = []
+        soup = self.make_soup(content, SEARCH_PAGE_STRAINER)
+        return self.extract_links_from_soup(soup)
+    
+    def extract_links_from_soup(self, soup):
+        """Extract detail page links from an already parsed search results page"""
+        links = [item['url'] for item in self.extract_listing_items(soup)]
+        print(f"Found {len(links)} links on this page")
+        return links
+    
+    def extract_listing_items(self, soup):
+        """Extract link, name and listing-level update date for each search result item"""
+        items = []
         
         # Find all result items (both odd and even, programs and locations)
         result_items = soup.find_all('li', class_=re.compile(r'result-item\s+(program|location)\s+(odd|even)'))
@@ -51,15 +200,61 @@ class Earth911Scraper:
             if title_link:
                 link_tag = title_link.find('a')
                 if link_tag and link_tag.get('href'):
-                    full_url = urljoin(self.base_url, link_tag.get('href'))
-                    links.append(full_url)
-        
-        print(f"Found {len(links)} links on this page")
-        return links
+                    listing = {
+                        'url': urljoin(self.base_url, link_tag.get('href')),
+                        'Business_Name': self.clean_text(link_tag.get_text()),
+                        'last_update_date': ''
+                    }
+                    
+                    # Listings carry the same "Updated <date>" stamp as the detail page
+                    last_verified = item.find('span', class_='last-verified')
+                    if last_verified:
+                        listing['last_update_date'] = self.parse_date(self.clean_text(last_verified.get_text()))
+                    else:
+                        updated_text = item.find(string=re.compile(r'Updated\s+\w+'))
+                        if updated_text:
+                            listing['last_update_date'] = self.parse_date(self.clean_text(str(updated_text)))
+                    
+                    street_address, city_state_zip = self.extract_listing_address(item)
+                    listing['street_address'] = self.format_full_address(street_address, city_state_zip)
+                    listing['has_street_address'] = bool(street_address)
+                    # No materials table on a listing, so this reads the result-materials spans
+                    listing['materials_accepted'] = self.extract_materials_from_table(item)
+                    items.append(listing)
+        
+        return items
     
-    def get_all_search_pages(self, base_url):
-        """Get links from all paginated search result pages"""
-        all_links = []
+    def extract_listing_address(self, item):
+        """(street address, city/state/zip) of a search result item; the street is '' for area-wide programs"""
+        contact = item.find('p', class_='contact')
+        if contact:
+            street_parts = []
+            for class_name in ('address1', 'address2'):
+                span = contact.find('span', class_=class_name)
+                if span and self.clean_text(span.get_text()):
+                    street_parts.append(self.clean_text(span.get_text()))
+            city_span = contact.find('span', class_='address3')
+            city_state_zip = self.clean_text(city_span.get_text()) if city_span else ''
+            return ', '.join(street_parts), city_state_zip
+        
+        # Fallback for results that give the address as separate p.address lines, street first
+        lines = [self.clean_text(p.get_text()) for p in item.find_all('p', class_='address')]
+        lines = [line for line in lines if line]
+        if len(lines) >= 2:
+            return lines[0], lines[1]
+        return '', lines[0] if lines else ''
+    
+    def listing_is_complete(self, listing):
+        """True when a listing has everything a record needs, so its detail page can be skipped"""
+        return bool(listing['Business_Name'] and listing['last_update_date'] and listing['has_street_address'])
+    
+    def iter_search_page_links(self, base_url):
+        """Yield detail links page by page, fetching and parsing each results page once"""
+        for listing in self.iter_search_page_items(base_url):
+            yield listing['url']
+    
+    def iter_search_page_items(self, base_url):
+        """Yield listing items page by page, fetching and parsing each results page once"""
         current_page = 1
         
         while True:
@@ -76,18 +271,21 @@ class Earth911Scraper:
             content = self.get_page_content(page_url)
             if not content:
                 print(f"Failed to get content for page {current_page}")
-                break
-            
-            soup = BeautifulSoup(content, 'html.parser')
+                return
             
-            # Extract links from current page
-            page_links = self.extract_main_page_links(page_url)
+            with self.metrics.timer('scraper_parse_seconds', page='search'):
+                soup = self.make_soup(content, SEARCH_PAGE_STRAINER)
+                
+                # Extract listings from the soup we already have instead of fetching the page again
+                page_items = self.extract_listing_items(soup)
+            print(f"Found {len(page_items)} links on this page")
             
-            if not page_links:
+            if not page_items:
                 print(f"No links found on page {current_page}, stopping pagination")
-                break
+                return
             
-            all_links.extend(page_links)
+            # Hand listings to the caller before touching the next page
+            yield from page_items
             
             # Check if there's a next page
             pager = soup.find('div', class_='pager')
@@ -98,12 +296,57 @@ class Earth911Scraper:
                 
             if not next_link:
                 print(f"No next page found, pagination complete")
-                break
+                return
             
             current_page += 1
-            
-            # Add a small delay between page requests
-            time.sleep(1)
+    
+    def build_search_url(self, what, where, max_distance=100):
+        """Build the search results URL for one (what, where, radius) query"""
+        params = {
+            'what': what,
+            'where': where,
+            'list_filter': 'all',
+            'max_distance': max_distance,
+            'family_id': '',
+            'latitude': '',
+            'longitude': '',
+            'country': '',
+            'province': '',
+            'city': '',
+            'sponsor': ''
+        }
+        return f"{self.base_url}/?{urlencode(params)}"
+    
+    def normalize_detail_url(self, url):
+        """Reduce a detail URL to host and path, dropping the search context in its query string"""
+        # Shared with archive.py, which dedupes captured detail pages on the same key
+        return normalize_detail_url(url)
+    
+    def iter_query_items(self, queries):
+        """Yield listing items for several (what, where, radius) queries, each location only once"""
+        for what, where, max_distance in queries:
+            print(f"\n=== Query: {what} near {where} within {max_distance} miles ===")
+            query_new = 0
+            for listing in self.iter_search_page_items(self.build_search_url(what, where, max_distance)):
+                self.dedup_stats['listings'] += 1
+                key = self.normalize_detail_url(listing['url'])
+                if key in self.seen_detail_urls:
+                    self.dedup_stats['duplicates'] += 1
+                    continue
+                self.seen_detail_urls.add(key)
+                self.dedup_stats['unique'] += 1
+                query_new += 1
+                yield listing
+            print(f"Query added {query_new} new locations")
+    
+    def iter_query_links(self, queries):
+        """Yield detail links for several queries, each location only once"""
+        for listing in self.iter_query_items(queries):
+            yield listing['url']
+    
+    def get_all_search_pages(self, base_url):
+        """Get links from all paginated search result pages"""
+        all_links = list(self.iter_search_page_links(base_url))
         
         print(f"\nTotal links found across all pages: {len(all_links)}")
         return all_links
@@ -204,13 +447,42 @@ class Earth911Scraper:
     
     def extract_detail_page_data(self, url):
         """Extract data from individual detail page"""
+        if self.is_checkpointed(url):
+            return self.checkpoint.get(self.normalize_detail_url(url))
+        
         print(f"Scraping: {url}")
         content = self.get_page_content(url)
         
         if not content:
             return None
         
-        soup = BeautifulSoup(content, 'html.parser')
+        data = None
+        if self.parse_cache is not None:
+            fingerprint = content_fingerprint(content)
+            data = self.parse_cache.lookup(self.normalize_detail_url(url), fingerprint)
+            self.metrics.inc('scraper_cache_total', outcome='parse_hit' if data is not None else 'parse_miss')
+        
+        if data is None:
+            with self.metrics.timer('scraper_parse_seconds', page='detail'):
+                if self.parse_pool:
+                    # The fetching thread waits here while a worker process parses
+                    data = self.parse_pool.submit(_parse_detail_in_worker, content).result()
+                else:
+                    data = self.parse_detail_content(content)
+            if data and self.parse_cache is not None:
+                self.parse_cache.store(self.normalize_detail_url(url), fingerprint, data)
+        
+        if data and self.checkpoint is not None:
+            self.checkpoint.record(self.normalize_detail_url(url), data)
+        return data
+    
+    def is_checkpointed(self, url):
+        """True when a previous, interrupted run already scraped this detail page"""
+        return self.checkpoint is not None and self.normalize_detail_url(url) in self.checkpoint
+    
+    def parse_detail_content(self, content):
+        """Extract the record fields from a detail page's HTML"""
+        soup = self.make_soup(content, DETAIL_PAGE_STRAINER)
         data = {
             'Business_Name': '',
             'last_update_date': '',
@@ -270,10 +542,16 @@ class Earth911Scraper:
         
         return data
     
-    def scrape_all_pages(self, main_url, delay_between_requests=2):
+    def scrape_all_pages(self, main_url, delay_between_requests=2, max_workers=1, requests_per_second=None):
         """Scrape all pages from the main URL and all pagination pages"""
         print("=== Starting Earth911 Electronics Recycling Scraper ===")
         
+        # One worker starts at one request per delay_between_requests; the limiter adapts from there.
+        # No delay at all starts at the limiter's ceiling
+        if not requests_per_second:
+            requests_per_second = 1.0 / delay_between_requests if delay_between_requests > 0 else self.rate_limiter.default_max_rate
+        self.rate_limiter.configure(requests_per_second)
+        
         # Get all links from all paginated search result pages
         all_links = self.get_all_search_pages(main_url)
         
@@ -283,45 +561,288 @@ class Earth911Scraper:
         
         print(f"\n=== Starting to scrape {len(all_links)} detail pages ===")
         
+        if max_workers > 1:
+            self.scrape_detail_pages_concurrently(all_links, max_workers)
+            print(f"\n=== Scraping completed! ===")
+            print(f"Successfully collected {self.records_emitted} records out of {len(all_links)} attempted.")
+            return self.scraped_data
+        
         for i, link in enumerate(all_links, 1):
             print(f"Progress: {i}/{len(all_links)} - {(i/len(all_links)*100):.1f}%")
             
             data = self.extract_detail_page_data(link)
             if data:
-                self.scraped_data.append(data)
+                self.emit_record(data, link)
+                print(f"  ✓ Successfully scraped: {data['Business_Name']}")
+            else:
+                print(f"  ✗ Failed to scrape: {link}")
+        
+        print(f"\n=== Scraping completed! ===")
+        print(f"Successfully collected {self.records_emitted} records out of {len(all_links)} attempted.")
+        return self.scraped_data
+    
+    def scrape_detail_pages_concurrently(self, links, max_workers=4, requests_per_second=None):
+        """Fetch detail pages on a bounded thread pool, keeping results in link order"""
+        if requests_per_second:
+            self.rate_limiter.configure(requests_per_second)
+        for i, (link, data) in enumerate(self.iter_detail_pages(links, max_workers), 1):
+            print(f"Progress: {i}/{len(links)} - {(i/len(links)*100):.1f}%")
+            if data:
+                self.emit_record(data, link)
                 print(f"  ✓ Successfully scraped: {data['Business_Name']}")
             else:
                 print(f"  ✗ Failed to scrape: {link}")
+        
+        return self.scraped_data
+    
+    def iter_detail_pages(self, links, max_workers=4):
+        """Yield (link, data) pairs for detail pages fetched concurrently, in link order"""
+        # Pacing comes from the shared per-host rate limiter, not from sleeps between requests
+        self.transport.ensure_pool_size(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map yields results in submission order, so output follows link order
+            yield from zip(links, executor.map(self.extract_detail_page_data, links))
+    
+    def address_key(self, address):
+        """Address reduced to lowercase letters and digits, so listing and detail formatting compare equal"""
+        return re.sub(r'[^a-z0-9]', '', (address or '').lower())
+    
+    def previous_record_key(self, record):
+        """Match key for incremental runs; chain stores share a name and date, so the address is part of it"""
+        return (record.get('Business_Name', ''), record.get('last_update_date', ''),
+                self.address_key(record.get('street_address', '')))
+    
+    def load_previous_records(self, filename='earth911_electronics_recycling.json'):
+        """Index records from a previous JSON export by name, update date and street address"""
+        try:
+            with open(filename, 'r', encoding='utf-8') as jsonfile:
+                records = json.load(jsonfile)
+        except (OSError, ValueError) as e:
+            print(f"No previous data loaded from {filename}: {e}")
+            return {}
+        
+        # Exact duplicates can still collide, so keep every match
+        previous = {}
+        for record in records:
+            previous.setdefault(self.previous_record_key(record), []).append(record)
+        return previous
+    
+    def scrape_incremental(self, main_url=None, previous_file='earth911_electronics_recycling.json', max_workers=4, requests_per_second=None, queries=None):
+        """Fetch detail pages only for new or updated listings and merge with the previous run"""
+        print("=== Starting Earth911 incremental re-scrape ===")
+        if requests_per_second:
+            self.rate_limiter.configure(requests_per_second)
+        previous = self.load_previous_records(previous_file)
+        if queries:
+            listings = list(self.iter_query_items(queries))
+        else:
+            listings = list(self.iter_search_page_items(main_url))
+        
+        if not listings:
+            print("No links found to scrape!")
+            return []
+        
+        records = [None] * len(listings)
+        to_fetch = []
+        for index, listing in enumerate(listings):
+            matches = previous.get(self.previous_record_key(listing))
+            # Listings without an "Updated" stamp cannot be compared, so they are always fetched, as are
+            # listings whose address matches no previous record
+            if listing['last_update_date'] and matches:
+                records[index] = matches.pop(0)
+            else:
+                to_fetch.append(index)
+        
+        print(f"\n=== {len(listings) - len(to_fetch)} listings unchanged, fetching {len(to_fetch)} new or updated ===")
+        
+        links = [listings[index]['url'] for index in to_fetch]
+        fetched = self.iter_detail_pages(links, max_workers)
+        for index, (link, data) in zip(to_fetch, fetched):
+            if data:
+                records[index] = data
+                print(f"  ✓ Successfully scraped: {data['Business_Name']}")
+            else:
+                print(f"  ✗ Failed to scrape: {link}")
+        
+        # Listings that no longer appear in the search results are dropped
+        for listing, record in zip(listings, records):
+            if record:
+                self.emit_record(record, listing['url'])
+        
+        print(f"\n=== Incremental scrape completed! ===")
+        print(f"Reused {len(listings) - len(to_fetch)} records, fetched {len(to_fetch)} detail pages "
+              f"({len(listings) - len(to_fetch)} requests saved), {self.records_emitted} records total.")
+        return self.scraped_data
+    
+    def scrape_listings(self, main_url=None, queries=None, max_workers=4, requests_per_second=None):
+        """Build records from search result items, fetching detail pages only for incomplete listings"""
+        print("=== Starting Earth911 listing-only scrape ===")
+        if requests_per_second:
+            self.rate_limiter.configure(requests_per_second)
+        if queries:
+            listings = list(self.iter_query_items(queries))
+        else:
+            listings = list(self.iter_search_page_items(main_url))
+        
+        if not listings:
+            print("No links found to scrape!")
+            return []
+        
+        to_fetch = [index for index, listing in enumerate(listings) if not self.listing_is_complete(listing)]
+        print(f"\n=== {len(listings) - len(to_fetch)} listings complete, fetching {len(to_fetch)} detail pages "
+              f"for missing addresses or dates ===")
+        
+        records = [
+            {field: listing[field] for field in EARTH911_FIELDS}
+            for listing in listings
+        ]
+        links = [listings[index]['url'] for index in to_fetch]
+        fetched = self.iter_detail_pages(links, max_workers)
+        for index, (link, data) in zip(to_fetch, fetched):
+            if data:
+                records[index] = data
+                print(f"  ✓ Completed from detail page: {data['Business_Name']}")
+            else:
+                # Keep what the listing had rather than dropping the location
+                print(f"  ✗ Failed to scrape: {link}, keeping the listing data")
+        
+        for listing, record in zip(listings, records):
+            self.emit_record(record, listing['url'])
+        
+        print(f"\n=== Listing-only scrape completed! ===")
+        print(f"{self.records_emitted} records, {len(to_fetch)} detail pages fetched "
+              f"({len(listings) - len(to_fetch)} requests saved).")
+        return self.scraped_data
+    
+    def scrape_pipeline(self, main_url, max_workers=4, requests_per_second=None, queue_size=100, on_record=None):
+        """Overlap search pagination, detail fetching and record writing in one pipeline"""
+        print("=== Starting Earth911 Electronics Recycling Scraper (pipelined) ===")
+        return self.run_pipeline(self.iter_search_page_links(main_url), max_workers, requests_per_second, queue_size, on_record)
+    
+    def scrape_queries(self, queries, max_workers=4, requests_per_second=None, queue_size=100, on_record=None):
+        """Crawl a list of (what, where, radius) queries, fetching each unique location once"""
+        print(f"=== Starting Earth911 crawl of {len(queries)} queries ===")
+        data = self.run_pipeline(self.iter_query_links(queries), max_workers, requests_per_second, queue_size, on_record)
+        
+        print(f"Deduplication: {self.dedup_stats['listings']} listings seen, {self.dedup_stats['unique']} unique locations, "
+              f"{self.dedup_stats['duplicates']} detail fetches saved")
+        return data
+    
+    def run_pipeline(self, links, max_workers=4, requests_per_second=None, queue_size=100, on_record=None):
+        """Feed links from any iterable through the detail-worker and writer stages"""
+        # Bounded queues give backpressure: a full queue blocks the stage feeding it
+        link_queue = queue.Queue(maxsize=queue_size)
+        record_queue = queue.Queue(maxsize=queue_size)
+        stats = {name: StageStats(name) for name in ('search', 'detail', 'writer')}
+        self.pipeline_stats = stats
+        # One keep-alive connection per detail worker plus one for the search stage
+        self.transport.ensure_pool_size(max_workers + 1)
+        if requests_per_second:
+            self.rate_limiter.configure(requests_per_second)
+        
+        def produce_links():
+            try:
+                for index, link in enumerate(links):
+                    link_queue.put((index, link))
+                    stats['search'].record(link_queue.qsize())
+            except Exception as e:
+                print(f"Search stage failed: {e}")
+            finally:
+                # One stop marker per detail worker
+                for _ in range(max_workers):
+                    link_queue.put(None)
+        
+        def fetch_details():
+            while True:
+                item = link_queue.get()
+                if item is None:
+                    break
+                index, link = item
+                try:
+                    data = self.extract_detail_page_data(link)
+                except Exception as e:
+                    print(f"  ✗ Error scraping {link}: {e}")
+                    data = None
+                record_queue.put((index, link, data))
+                stats['detail'].record(record_queue.qsize())
+            record_queue.put(None)
+        
+        threads = [threading.Thread(target=produce_links, daemon=True)]
+        threads += [threading.Thread(target=fetch_details, daemon=True) for _ in range(max_workers)]
+        
+        start_time = time.monotonic()
+        first_record_time = None
+        attempted = 0
+        finished_workers = 0
+        # Workers finish out of order; hold early results until their turn so output follows link order
+        pending = {}
+        next_index = 0
+        for thread in threads:
+            thread.start()
+        
+        # Writer stage runs on the calling thread and persists records as they arrive
+        while finished_workers < max_workers:
+            item = record_queue.get()
+            if item is None:
+                finished_workers += 1
+                continue
             
-            # Be respectful with delays
-            if i < len(all_links):  # Don't delay after the last request
-                time.sleep(delay_between_requests)
+            index, link, data = item
+            pending[index] = (link, data)
+            while next_index in pending:
+                link, data = pending.pop(next_index)
+                next_index += 1
+                attempted += 1
+                if data:
+                    if first_record_time is None:
+                        first_record_time = time.monotonic() - start_time
+                    data = self.emit_record(data, link)
+                    if on_record:
+                        on_record(data)
+                    print(f"  ✓ Successfully scraped: {data['Business_Name']}")
+                else:
+                    print(f"  ✗ Failed to scrape: {link}")
+            stats['writer'].record(record_queue.qsize())
+        
+        for thread in threads:
+            thread.join()
         
+        total_time = time.monotonic() - start_time
         print(f"\n=== Scraping completed! ===")
-        print(f"Successfully collected {len(self.scraped_data)} records out of {len(all_links)} attempted.")
+        print(f"Successfully collected {self.records_emitted} records out of {attempted} attempted.")
+        if first_record_time is not None:
+            print(f"Time to first record: {first_record_time:.2f}s")
+        print(f"Total wall time: {total_time:.2f}s")
+        for stage in stats.values():
+            print(f"  {stage.summary()}")
+        print(f"  rate limits: {self.rate_limiter.summary()}")
+        print(f"  {self.transport.summary()}")
+        
         return self.scraped_data
     
+    def emit_record(self, data, url=''):
+        """Hand a finished record to the streaming sinks and, unless disabled, keep it in memory"""
+        # Records are held as compact Earth911Record objects; the sinks expand them back out
+        record = Earth911Record.from_dict(data, self.normalize_detail_url(url) if url else '')
+        self.records_emitted += 1
+        self.metrics.inc('scraper_records_total', site='earth911')
+        if self.keep_in_memory:
+            self.scraped_data.append(record)
+        for sink in self.sinks:
+            with self.metrics.timer('scraper_sink_write_seconds', sink=type(sink).__name__):
+                sink.write(record)
+        return record
+    
     def save_to_csv(self, filename='earth911_electronics_recycling.csv'):
         """Save scraped data to CSV file with only required columns"""
         if not self.scraped_data:
             print("No data to save")
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Business_Name', 'last_update_date', 'street_address', 'materials_accepted']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
+        # Materials lists are joined with '; ' row by row, without copying the dataset
+        with CsvRecordSink(filename, EARTH911_FIELDS) as sink:
             for row in self.scraped_data:
-                # Convert materials list to semicolon-separated string
-                row_copy = row.copy()
-                if isinstance(row['materials_accepted'], list):
-                    row_copy['materials_accepted'] = '; '.join(row['materials_accepted'])
-                else:
-                    row_copy['materials_accepted'] = str(row['materials_accepted'])
-                writer.writerow(row_copy)
-        
-        print(f"Data saved to {filename}")
+                sink.write(row)
     
     def save_to_json(self, filename='earth911_electronics_recycling.json'):
         """Save scraped data to JSON file with only required fields"""
@@ -329,56 +850,128 @@ class Earth911Scraper:
             print("No data to save")
             return
         
-        # Create clean data with only required fields
-        clean_data = []
-        for item in self.scraped_data:
-            clean_item = {
-                'Business_Name': item['Business_Name'],
-                'last_update_date': item['last_update_date'],
-                'street_address': item['street_address'],
-                'materials_accepted': item['materials_accepted']
-            }
-            clean_data.append(clean_item)
-        
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(clean_data, jsonfile, indent=2, ensure_ascii=False)
-        
-        print(f"Data saved to {filename}")
+        # Records are serialized one at a time instead of building a second list
+        with JsonArrayRecordSink(filename, EARTH911_FIELDS) as sink:
+            for item in self.scraped_data:
+                sink.write(item)
+
+    def close(self):
+        """Close the sinks, save the parse cache and shut down the parse worker processes and the HTTP transport"""
+        if self.parse_pool:
+            self.parse_pool.shutdown()
+            self.parse_pool = None
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.parse_cache is not None:
+            self.parse_cache.save()
+        if self.archive is not None:
+            self.archive.close()
+        for sink in self.sinks:
+            sink.close()
+        self.transport.close()
+
+# Each parse worker process keeps its own network-free scraper for extraction
+_parse_worker_scraper = None
+
+def _init_parse_worker(parser, partial_parse):
+    global _parse_worker_scraper
+    _parse_worker_scraper = Earth911Scraper(parser=parser, partial_parse=partial_parse)
+
+def _parse_detail_in_worker(content):
+    """Run detail/materials extraction in a worker process and return a plain record dict"""
+    return _parse_worker_scraper.parse_detail_content(content)
 
 # Usage example
 if __name__ == "__main__":
-    scraper = Earth911Scraper()
+    # Cache pages on disk so re-runs revalidate with cheap conditional GETs,
+    # parse detail pages on two worker processes next to the fetch threads,
+    # checkpoint finished pages so an interrupted crawl resumes where it stopped,
+    # skip parsing detail pages whose content has not changed since the last run,
+    # and stream every record to disk as it arrives instead of holding the crawl in memory
+    sinks = [
+        CsvRecordSink('earth911_electronics_recycling.csv'),
+        JsonArrayRecordSink('earth911_electronics_recycling.json'),
+        JsonLinesRecordSink('earth911_electronics_recycling.jsonl')
+    ]
+    if '--store' in sys.argv:
+        # Also upsert into the indexed SQLite store queried by recycling_store.py
+        sinks.append(RecyclingStoreSink('earth911_recycling.db'))
+    
+    # --base-url points the crawl at another host, e.g. `python earth911_standin.py serve`
+    base_url = sys.argv[sys.argv.index('--base-url') + 1] if '--base-url' in sys.argv else "https://search.earth911.com"
+    
+    scraper = Earth911Scraper(
+        base_url=base_url,
+        cache=ResponseCache('.earth911_cache'),
+        parse_workers=2,
+        checkpoint=CheckpointLog('earth911_checkpoint.jsonl'),
+        parse_cache=ParseCache('earth911_parsed.json'),
+        # --capture archives every page for `python archive.py reextract` after a parser fix
+        archive=ArchiveWriter('earth911_capture.warc.gz') if '--capture' in sys.argv else None,
+        sinks=sinks,
+        keep_in_memory=False
+    )
     
-    # Your main URL
-    main_url = "https://search.earth911.com/?what=Electronics&where=10001&list_filter=all&max_distance=100&family_id=&latitude=&longitude=&country=&province=&city=&sponsor="
+    # (what, where, max_distance) searches to cover; locations found by
+    # several overlapping searches are only fetched once
+    queries = [
+        ('Electronics', '10001', 100),
+    ]
     
-    # Scrape ALL pages and ALL links (this will take a while!)
-    data = scraper.scrape_all_pages(main_url, delay_between_requests=2)
+    def crawl():
+        if '--listing-only' in sys.argv:
+            # Records come straight from the search results; detail pages only fill in missing fields
+            scraper.scrape_listings(queries=queries, max_workers=4, requests_per_second=2.0)
+        elif '--incremental' in sys.argv:
+            # Only fetch detail pages for listings that are new or changed since the last export
+            scraper.scrape_incremental(queries=queries, max_workers=4, requests_per_second=2.0)
+        else:
+            # Scrape ALL pages and ALL links: search pages feed 4 detail workers; the rate
+            # limiter starts at 2 requests per second and adapts to how earth911.com responds
+            scraper.scrape_queries(queries, max_workers=4, requests_per_second=2.0)
     
-    # Save results
-    scraper.save_to_csv()
-    scraper.save_to_json()
+    if '--profile' in sys.argv:
+        # cProfile around the whole crawl; pass profiler='pyinstrument' when it is installed
+        profile_run(crawl, output='earth911_profile.prof')
+    else:
+        crawl()
     
-    # Print detailed summary
+    print(f"\n{scraper.cache.summary()}")
+    print(scraper.parse_cache.summary())
+    print(scraper.transport.summary())
+    print(scraper.metrics.summary())
+    scraper.metrics.write_json('earth911_metrics.json')
+    scraper.metrics.write_prometheus('earth911_metrics.prom')
+    
+    # Closing the sinks finishes the files; the crawl is saved, so the next run starts fresh
+    scraper.close()
+    scraper.checkpoint.clear()
+    
+    # Print detailed summary, reading the JSON Lines output back one record at a time
     print(f"\n=== FINAL SUMMARY ===")
-    print(f"Total records scraped: {len(data)}")
+    print(f"Total records scraped: {scraper.records_emitted}")
     
-    if data:
-        print(f"\nSample record:")
-        for key, value in data[0].items():
-            if key == 'materials_accepted' and isinstance(value, list):
-                print(f"  {key}: {len(value)} materials - {value[:3]}{'...' if len(value) > 3 else ''}")
-            else:
-                print(f"  {key}: {str(value)[:100]}{'...' if len(str(value)) > 100 else ''}")
+    if scraper.records_emitted:
+        business_names = []
+        with open('earth911_electronics_recycling.jsonl', 'r', encoding='utf-8') as jsonlfile:
+            for line_number, line in enumerate(jsonlfile):
+                item = json.loads(line)
+                if line_number == 0:
+                    print(f"\nSample record:")
+                    for key, value in item.items():
+                        if key == 'materials_accepted' and isinstance(value, list):
+                            print(f"  {key}: {len(value)} materials - {value[:3]}{'...' if len(value) > 3 else ''}")
+                        else:
+                            print(f"  {key}: {str(value)[:100]}{'...' if len(str(value)) > 100 else ''}")
+                if item['Business_Name'] and len(business_names) < 10:
+                    business_names.append(item['Business_Name'])
         
         # Print business types summary
-        business_names = [item['Business_Name'] for item in data if item['Business_Name']]
-        print(f"\nBusiness names found: {len(business_names)}")
-        for i, name in enumerate(business_names[:10], 1):
+        print(f"\nBusiness names found (first {len(business_names)}):")
+        for i, name in enumerate(business_names, 1):
             print(f"  {i}. {name}")
-        if len(business_names) > 10:
-            print(f"  ... and {len(business_names) - 10} more")
     
     print(f"\nFiles saved:")
     print(f"  - earth911_electronics_recycling.csv")
-    print(f"  - earth911_electronics_recycling.json")
\ No newline at end of file
+    print(f"  - earth911_electronics_recycling.json")
+    print(f"  - earth911_electronics_recycling.jsonl")
\ No newline at end of file
@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, spanning a cached parse up to a slow page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'scraper_fetch_seconds': "HTTP request latency by host and status ('error' when no response came back)",
+    'scraper_fetch_retries_total': "Requests retried after a failed attempt",
+    'scraper_wire_bytes_total': "Response bytes received before content decoding",
+    'scraper_decoded_bytes_total': "Response bytes after content decoding",
+    'scraper_cache_total': "Page lookups answered by the HTTP or parse cache, by outcome",
+    'scraper_parse_seconds': "Time to parse and extract one page",
+    'scraper_sink_write_seconds': "Time to write one record to a sink",
+    'scraper_records_total': "Records produced",
+    'scraper_selenium_wait_seconds': "Selenium readiness waits by wait and outcome",
+    'scraper_records_per_second': "Records produced per second of run time"
+}
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Cumulative-bucket histogram in the Prometheus style"""
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (an estimate, as in Prometheus)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        # Past the last bucket; the largest observation is the only bound left
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        """Thread-safe counters and latency histograms keyed by metric name and labels"""
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.monotonic()
+
+    def _key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe how long the with-block takes"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def records_per_second(self):
+        elapsed = time.monotonic() - self.started
+        records = sum(value for (name, _), value in self.counters.items() if name == 'scraper_records_total')
+        return records / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        """JSON-ready summary: counter values and per-histogram count, mean, p50, p95 and max"""
+        with self.lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'max': round(histogram.max, 6)
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+        return {
+            'elapsed_seconds': round(time.monotonic() - self.started, 3),
+            'records_per_second': round(self.records_per_second(), 3),
+            'counters': counters,
+            'histograms': histograms
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Metrics saved to {path}")
+
+    def prometheus_text(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        described = set()
+
+        def describe(name, metric_type):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                describe(name, 'counter')
+                lines.append(f"{name}{label_text(labels)} {value}")
+
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                describe(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{label_text(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{label_text(labels)} {histogram.count}")
+
+        describe('scraper_records_per_second', 'gauge')
+        lines.append(f"scraper_records_per_second {self.records_per_second():.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the exposition text, e.g. for node_exporter's textfile collector"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        print(f"Metrics saved to {path}")
+
+    def summary(self):
+        """One line per counter, then per histogram with the slowest total first, for the end-of-run report"""
+        data = self.to_dict()
+        lines = [f"metrics: {data['records_per_second']:.2f} records/s over {data['elapsed_seconds']:.1f}s"]
+        for item in data['counters']:
+            labels = ', '.join(f"{key}={value}" for key, value in item['labels'].items())
+            lines.append(f"  {item['name']}{{{labels}}}: {item['value']}")
+        for item in sorted(data['histograms'], key=lambda item: item['sum'], reverse=True):
+            labels = ', '.join(f"{key}={value}" for key, value in item['labels'].items())
+            lines.append(f"  {item['name']}{{{labels}}}: {item['count']} x {item['mean'] * 1000:.1f} ms avg, "
+                         f"p95 <= {item['p95'] * 1000:.0f} ms, {item['sum']:.2f}s total")
+        return '\n'.join(lines)
+
+
+def profile_run(func, *args, profiler='cprofile', output=None, **kwargs):
+    """Run func under cProfile (or pyinstrument, if installed) and print where the time went"""
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, profiling with cProfile instead")
+        else:
+            instrument = Profiler()
+            instrument.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrument.stop()
+                print(instrument.output_text(unicode=True, color=False))
+                if output:
+                    with open(output, 'w', encoding='utf-8') as f:
+                        f.write(instrument.output_html())
+                    print(f"Profile saved to {output}")
+
+    import cProfile
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profile.disable()
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(25)
+        if output:
+            profile.dump_stats(output)
+            print(f"Profile saved to {output}")
@@ -0,0 +1,22 @@
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml builds the same trees several times faster than the pure-Python parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+def class_strainer(*class_names):
+    """SoupStrainer keeping only the subtrees of tags carrying one of the given classes"""
+    # Match whole class tokens against the full class attribute; this behaves the
+    # same on old and new BeautifulSoup releases, unlike a plain list of names
+    pattern = re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(re.escape(name) for name in class_names))
+    return SoupStrainer(class_=pattern)
+
+
+def make_soup(content, parser=None, parse_only=None):
+    """Parse HTML with the configured backend, optionally building only strained subtrees"""
+    return BeautifulSoup(content, parser or HTML_PARSER, parse_only=parse_only)
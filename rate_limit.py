@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter for the given zero-based retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, initial_rate=2.0, min_rate=0.1, max_rate=8.0, burst=1.0,
+                 increase_step=0.1, increase_fraction=0.02, throttle_factor=0.5, latency_factor=0.75, latency_spike=3.0):
+        """Per-host token bucket that speeds up while responses are healthy and backs off under throttling"""
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        # An explicitly requested starting rate is never capped below itself; the declared ceiling is
+        # kept so a later, slower configure() does not inherit an earlier fast run's ceiling
+        self.default_max_rate = max_rate
+        self.max_rate = max(max_rate, initial_rate)
+        self.burst = burst
+        # Additive increase on success, multiplicative decrease on trouble. The step grows with the
+        # configured rate, so a fast crawl recovers from a halving in tens of responses, not thousands
+        self.increase_step = increase_step
+        self.increase_fraction = increase_fraction
+        self.throttle_factor = throttle_factor
+        self.latency_factor = latency_factor
+        self.latency_spike = latency_spike
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def configure(self, initial_rate):
+        """Set the starting rate, with the ceiling at the default or the rate if higher, and forget each host's state"""
+        with self.lock:
+            self.initial_rate = initial_rate
+            self.max_rate = max(self.default_max_rate, initial_rate)
+            self.hosts = {}
+
+    def _host_state(self, url):
+        host = urlparse(url).netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = {
+                'rate': min(self.max_rate, max(self.min_rate, self.initial_rate)),
+                'tokens': self.burst,
+                'updated': time.monotonic(),
+                'blocked_until': 0.0,
+                'latency': None,
+                'throttled': 0
+            }
+            self.hosts[host] = state
+        return state
+
+    def wait(self, url):
+        """Block until the host of the URL has a token for another request"""
+        while True:
+            with self.lock:
+                state = self._host_state(url)
+                now = time.monotonic()
+                state['tokens'] = min(self.burst, state['tokens'] + (now - state['updated']) * state['rate'])
+                state['updated'] = now
+
+                if now < state['blocked_until']:
+                    delay = state['blocked_until'] - now
+                elif state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    return
+                else:
+                    delay = (1 - state['tokens']) / state['rate']
+            time.sleep(delay)
+
+    def on_success(self, url, latency):
+        """Speed up after a healthy response, or ease off if latency spiked"""
+        with self.lock:
+            state = self._host_state(url)
+            average = state['latency']
+            if average is not None and latency > average * self.latency_spike:
+                state['rate'] = max(self.min_rate, state['rate'] * self.latency_factor)
+            else:
+                step = max(self.increase_step, self.initial_rate * self.increase_fraction)
+                state['rate'] = min(self.max_rate, state['rate'] + step)
+            # Exponentially weighted moving average of response latency
+            state['latency'] = latency if average is None else average * 0.8 + latency * 0.2
+
+    def on_throttle(self, url, retry_after=None):
+        """Cut the host's rate after a 429/503 and pause it for Retry-After seconds"""
+        with self.lock:
+            state = self._host_state(url)
+            state['rate'] = max(self.min_rate, state['rate'] * self.throttle_factor)
+            state['throttled'] += 1
+            if retry_after:
+                state['blocked_until'] = max(state['blocked_until'], time.monotonic() + retry_after)
+
+    def on_error(self, url):
+        """Treat connection failures and timeouts like throttling, without a pause"""
+        self.on_throttle(url)
+
+    def summary(self):
+        with self.lock:
+            return '; '.join(
+                f"{host}: {state['rate']:.2f} req/s, {state['throttled']} throttled"
+                for host, state in self.hosts.items()
+            )
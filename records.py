@@ -0,0 +1,61 @@
+import sys
+
+from sinks import EARTH911_FIELDS
+
+
+class Earth911Record:
+    """Compact Earth911 record that reads like the dict it replaces"""
+
+    __slots__ = ('Business_Name', 'last_update_date', 'street_address', 'materials_accepted', 'detail_url')
+
+    def __init__(self, Business_Name='', last_update_date='', street_address='', materials_accepted=(), detail_url=''):
+        self.Business_Name = Business_Name
+        # Dates and material names repeat across thousands of records; interning keeps one copy of each
+        self.last_update_date = sys.intern(last_update_date)
+        self.street_address = street_address
+        self.materials_accepted = tuple(sys.intern(material) for material in materials_accepted)
+        # Kept for de-duplication and storage keys; not one of the exported fields
+        self.detail_url = detail_url
+
+    @classmethod
+    def from_dict(cls, data, detail_url=''):
+        if isinstance(data, cls):
+            return data
+        return cls(
+            data.get('Business_Name', ''),
+            data.get('last_update_date', ''),
+            data.get('street_address', ''),
+            data.get('materials_accepted', ()),
+            detail_url
+        )
+
+    def __getitem__(self, field):
+        if field not in EARTH911_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in EARTH911_FIELDS
+
+    def __eq__(self, other):
+        if isinstance(other, Earth911Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self):
+        return f"Earth911Record({self.Business_Name!r}, {len(self.materials_accepted)} materials)"
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in EARTH911_FIELDS else default
+
+    def keys(self):
+        return list(EARTH911_FIELDS)
+
+    def items(self):
+        return [(field, self[field]) for field in EARTH911_FIELDS]
+
+    def to_dict(self):
+        """The exported fields as a plain dict, materials as a list, as in the CSV/JSON output"""
+        data = dict(self.items())
+        data['materials_accepted'] = list(self.materials_accepted)
+        return data
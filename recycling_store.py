@@ -0,0 +1,243 @@
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+
+ZIP_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\s*$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    detail_url TEXT NOT NULL UNIQUE,
+    business_name TEXT NOT NULL,
+    last_update_date TEXT NOT NULL,
+    street_address TEXT NOT NULL,
+    zip_code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS locations_zip ON locations (zip_code);
+
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+
+-- Inverted index: material -> locations, clustered on the material so a lookup is one range scan
+CREATE TABLE IF NOT EXISTS location_materials (
+    material_id INTEGER NOT NULL REFERENCES materials (id),
+    location_id INTEGER NOT NULL REFERENCES locations (id) ON DELETE CASCADE,
+    PRIMARY KEY (material_id, location_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS location_materials_location ON location_materials (location_id);
+"""
+
+
+def extract_zip(address):
+    """Five-digit ZIP code at the end of a formatted address, or ''"""
+    match = ZIP_PATTERN.search(address or '')
+    return match.group(1) if match else ''
+
+
+class RecyclingStore:
+    def __init__(self, path='earth911_recycling.db'):
+        """SQLite store of recycling locations, indexed by material and ZIP code"""
+        self.path = path
+        self.lock = threading.Lock()
+        # Written from the pipeline's writer thread, read from wherever the store was opened
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.executescript(SCHEMA)
+        self.material_ids = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _material_id(self, name):
+        key = name.lower()
+        material_id = self.material_ids.get(key)
+        if material_id is None:
+            self.db.execute('INSERT OR IGNORE INTO materials (name) VALUES (?)', (name,))
+            material_id = self.db.execute('SELECT id FROM materials WHERE name = ?', (name,)).fetchone()[0]
+            self.material_ids[key] = material_id
+        return material_id
+
+    def upsert(self, record, detail_url=None, commit=True):
+        """Insert or replace one location and its materials, keyed by detail URL"""
+        detail_url = detail_url or getattr(record, 'detail_url', '') or record.get('detail_url', '')
+        if not detail_url:
+            # Records from an old JSON export have no URL; name and address identify them instead
+            detail_url = f"record:{record['Business_Name']}|{record['street_address']}"
+
+        with self.lock:
+            self.db.execute(
+                """INSERT INTO locations (detail_url, business_name, last_update_date, street_address, zip_code)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (detail_url) DO UPDATE SET
+                       business_name = excluded.business_name,
+                       last_update_date = excluded.last_update_date,
+                       street_address = excluded.street_address,
+                       zip_code = excluded.zip_code""",
+                (detail_url, record['Business_Name'], record['last_update_date'],
+                 record['street_address'], extract_zip(record['street_address']))
+            )
+            location_id = self.db.execute('SELECT id FROM locations WHERE detail_url = ?', (detail_url,)).fetchone()[0]
+            self.db.execute('DELETE FROM location_materials WHERE location_id = ?', (location_id,))
+            self.db.executemany(
+                'INSERT OR IGNORE INTO location_materials (material_id, location_id) VALUES (?, ?)',
+                [(self._material_id(material), location_id) for material in record['materials_accepted']]
+            )
+            if commit:
+                self.db.commit()
+        return location_id
+
+    def upsert_many(self, records):
+        """Upsert records in a single transaction; returns how many were written"""
+        count = 0
+        for record in records:
+            self.upsert(record, commit=False)
+            count += 1
+        self.commit()
+        return count
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def find(self, material=None, zip_code=None, zip_prefix=None, limit=100):
+        """Locations accepting a material, optionally in one ZIP code or under a ZIP prefix"""
+        if material:
+            sql = """SELECT l.* FROM materials m
+                     JOIN location_materials lm ON lm.material_id = m.id
+                     JOIN locations l ON l.id = lm.location_id
+                     WHERE m.name = ?"""
+            params = [material]
+        else:
+            sql = 'SELECT l.* FROM locations l WHERE 1'
+            params = []
+
+        if zip_code:
+            sql += ' AND l.zip_code = ?'
+            params.append(zip_code)
+        elif zip_prefix:
+            # GLOB prefix matches use the ZIP index; three digits cover one sectional centre, i.e. "nearby"
+            sql += ' AND l.zip_code GLOB ?'
+            params.append(zip_prefix + '*')
+
+        sql += ' ORDER BY l.business_name LIMIT ?'
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def materials_for(self, detail_url):
+        """Material names recorded for one location"""
+        with self.lock:
+            rows = self.db.execute(
+                """SELECT m.name FROM locations l
+                   JOIN location_materials lm ON lm.location_id = l.id
+                   JOIN materials m ON m.id = lm.material_id
+                   WHERE l.detail_url = ? ORDER BY m.name""",
+                (detail_url,)
+            )
+            return [row[0] for row in rows]
+
+    def material_counts(self):
+        """(material, number of locations) pairs, most widely accepted first"""
+        with self.lock:
+            rows = self.db.execute(
+                """SELECT m.name, COUNT(lm.location_id) AS locations FROM materials m
+                   LEFT JOIN location_materials lm ON lm.material_id = m.id
+                   GROUP BY m.id ORDER BY locations DESC, m.name"""
+            )
+            return [(row[0], row[1]) for row in rows]
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute('SELECT COUNT(*) FROM locations').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+class RecyclingStoreSink:
+    def __init__(self, path='earth911_recycling.db', commit_every=100):
+        """Streaming sink that upserts each scraped record into a RecyclingStore"""
+        self.store = RecyclingStore(path)
+        self.filename = path
+        self.commit_every = commit_every
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, record):
+        # One transaction per batch instead of an fsync per record
+        self.store.upsert(record, commit=False)
+        self.count += 1
+        if self.count % self.commit_every == 0:
+            self.store.commit()
+
+    def close(self):
+        if self.store.db is not None:
+            self.store.close()
+            self.store.db = None
+            print(f"Data saved to {self.filename} ({self.count} records)")
+
+
+def import_json(store, filename):
+    """Load a JSON export (earth911_electronics_recycling.json) or JSON Lines file into the store"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        if filename.endswith('.jsonl'):
+            records = (json.loads(line) for line in f if line.strip())
+            return store.upsert_many(records)
+        return store.upsert_many(json.load(f))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Query scraped Earth911 recycling locations by material and ZIP code")
+    arg_parser.add_argument('--db', default='earth911_recycling.db')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Load a JSON or JSON Lines export into the store")
+    import_parser.add_argument('filename')
+
+    query_parser = commands.add_parser('query', help="Find locations accepting a material")
+    query_parser.add_argument('--material')
+    query_parser.add_argument('--zip', dest='zip_code')
+    query_parser.add_argument('--nearby', action='store_true', help="Match every ZIP sharing the first three digits")
+    query_parser.add_argument('--limit', type=int, default=20)
+
+    commands.add_parser('materials', help="List materials by number of accepting locations")
+    args = arg_parser.parse_args()
+
+    with RecyclingStore(args.db) as store:
+        if args.command == 'import':
+            started = time.perf_counter()
+            count = import_json(store, args.filename)
+            print(f"Imported {count} records into {args.db} in {time.perf_counter() - started:.2f}s "
+                  f"({len(store)} locations stored)")
+
+        elif args.command == 'query':
+            started = time.perf_counter()
+            if args.nearby and args.zip_code:
+                rows = store.find(args.material, zip_prefix=args.zip_code[:3], limit=args.limit)
+            else:
+                rows = store.find(args.material, zip_code=args.zip_code, limit=args.limit)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for row in rows:
+                print(f"{row['business_name']} | {row['street_address']} | updated {row['last_update_date']}")
+            print(f"\n{len(rows)} locations in {elapsed_ms:.1f} ms")
+
+        elif args.command == 'materials':
+            for name, locations in store.material_counts():
+                print(f"{locations:>6}  {name}")
@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import threading
+
+EARTH911_FIELDS = ['Business_Name', 'last_update_date', 'street_address', 'materials_accepted']
+
+
+class RecordSink:
+    # Write to a temp file and swap it in on close, so an interrupted run keeps the previous good file
+    atomic = False
+
+    def __init__(self, filename, fieldnames=EARTH911_FIELDS):
+        """Base class for writers that persist each record as soon as it is produced"""
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.file = None
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        # Opened on the first record so a run that produces nothing leaves old output alone
+        path = f"{self.filename}.tmp" if self.atomic else self.filename
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+
+    def write(self, record):
+        """Write one record and flush it so readers see it while the crawl is running"""
+        with self.lock:
+            if self.file is None:
+                self.open()
+            self.write_record(record)
+            self.count += 1
+            self.file.flush()
+
+    def write_record(self, record):
+        raise NotImplementedError
+
+    def finish(self):
+        """Hook for writing a trailer before the file is closed"""
+
+    def close(self):
+        with self.lock:
+            if self.file is not None and not self.file.closed:
+                self.finish()
+                self.file.close()
+                if self.atomic:
+                    os.replace(f"{self.filename}.tmp", self.filename)
+                print(f"Data saved to {self.filename} ({self.count} records)")
+
+
+class CsvRecordSink(RecordSink):
+    atomic = True
+
+    def __init__(self, filename, fieldnames=EARTH911_FIELDS, list_separator='; '):
+        """CSV writer that joins list fields with a separator"""
+        super().__init__(filename, fieldnames)
+        self.list_separator = list_separator
+        self.writer = None
+
+    def open(self):
+        super().open()
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.fieldnames)
+
+    def write_record(self, record):
+        row = []
+        for field in self.fieldnames:
+            value = record[field]
+            if isinstance(value, (list, tuple)):
+                value = self.list_separator.join(value)
+            row.append(value)
+        self.writer.writerow(row)
+
+
+class JsonLinesRecordSink(RecordSink):
+    """JSON Lines writer, one record object per line"""
+
+    def write_record(self, record):
+        item = {field: record[field] for field in self.fieldnames}
+        self.file.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+
+class JsonArrayRecordSink(RecordSink):
+    """Writes a JSON array incrementally, laid out like json.dump(..., indent=2)"""
+
+    # A half-written array is not valid JSON, so readers only ever see a finished file
+    atomic = True
+
+    def open(self):
+        super().open()
+        self.file.write('[')
+
+    def write_record(self, record):
+        item = {field: record[field] for field in self.fieldnames}
+        text = json.dumps(item, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        self.file.write(('\n  ' if self.count == 0 else ',\n  ') + text)
+
+    def finish(self):
+        self.file.write('\n]')
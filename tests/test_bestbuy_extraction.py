@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from bonus import BestBuyStoreLocatorScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_store_cards_and_embedded_json_give_the_same_addresses():
+    scraper = BestBuyStoreLocatorScraper(browserless=True)
+    from_cards = scraper.extract_stores_from_html(load_fixture('bestbuy_results.html'))
+    from_json = scraper.extract_stores_from_embedded_json(load_fixture('bestbuy_locator_embedded.html'))
+
+    assert len(from_cards) == 15
+    assert [store['address'] for store in from_json] == [store['address'] for store in from_cards]
+    # Union Square has a suite line that the JSON carries as addr2
+    assert from_json[2]['address'] == '52 E 14th St, Number 64, New York, NY 10003'
@@ -0,0 +1,64 @@
+import contextlib
+import os
+
+import pytest
+
+from earth911_standin import Earth911Standin
+from main import Earth911Scraper
+
+LISTINGS = 30
+
+
+@pytest.fixture
+def standin():
+    # A little jitter makes workers finish out of order, which is what the ordering checks need
+    with Earth911Standin(listings=LISTINGS, per_page=10, jitter=0.02) as server:
+        yield server
+
+
+def quiet(call, *args, **kwargs):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return call(*args, **kwargs)
+
+
+def make_scraper(server):
+    return Earth911Scraper(base_url=server.base_url, requests_per_second=200.0)
+
+
+def search_links(scraper):
+    search_url = scraper.build_search_url('Electronics', '10001')
+    return search_url, quiet(list, scraper.iter_search_page_links(search_url))
+
+
+def test_concurrent_detail_pages_keep_link_order(standin):
+    scraper = make_scraper(standin)
+    _, links = search_links(scraper)
+    assert len(links) == LISTINGS
+
+    records = quiet(scraper.scrape_detail_pages_concurrently, links, max_workers=6)
+
+    assert [record.detail_url for record in records] == [scraper.normalize_detail_url(link) for link in links]
+
+
+def test_pipeline_keeps_link_order(standin):
+    scraper = make_scraper(standin)
+    search_url, links = search_links(scraper)
+
+    records = quiet(scraper.scrape_pipeline, search_url, max_workers=6)
+
+    assert [record.detail_url for record in records] == [scraper.normalize_detail_url(link) for link in links]
+
+
+def test_pipeline_completes_under_throttling_and_errors():
+    with Earth911Standin(listings=LISTINGS, per_page=10, jitter=0.02, throttle_rate=0.05, error_rate=0.05,
+                         retry_after=0) as server:
+        scraper = make_scraper(server)
+        search_url = scraper.build_search_url('Electronics', '10001')
+        records = quiet(scraper.scrape_pipeline, search_url, max_workers=6)
+        stats = server.stats
+
+    assert stats['throttled'] + stats['errors'] > 0
+    # A page can fail all three attempts, so allow a few gaps, but what arrives must stay in order
+    positions = [int(record.detail_url.rstrip('/').rsplit('/', 1)[-1]) for record in records]
+    assert positions == sorted(positions)
+    assert len(records) >= LISTINGS - 3
@@ -0,0 +1,72 @@
+import json
+
+from main import Earth911Scraper
+
+
+def make_listing(name, date, street_address, url):
+    return {
+        'url': url,
+        'Business_Name': name,
+        'last_update_date': date,
+        'street_address': street_address,
+        'has_street_address': True,
+        'materials_accepted': ['Cell Phones']
+    }
+
+
+def run_incremental(tmp_path, previous, listings):
+    previous_file = tmp_path / 'previous.json'
+    previous_file.write_text(json.dumps(previous), encoding='utf-8')
+    scraper = Earth911Scraper()
+    fetched = []
+
+    def fake_detail_pages(links, max_workers=4):
+        for link in links:
+            fetched.append(link)
+            number = link.rstrip('/').rsplit('/', 1)[-1]
+            yield link, {
+                'Business_Name': 'Sprint Store',
+                'last_update_date': '2013-7-30',
+                'street_address': f"{number} Fetched St, New York, NY 10001",
+                'materials_accepted': ['Cell Phones']
+            }
+
+    scraper.iter_search_page_items = lambda url: iter(listings)
+    scraper.iter_detail_pages = fake_detail_pages
+    records = [record.to_dict() for record in scraper.scrape_incremental('unused', previous_file=str(previous_file))]
+    return records, fetched
+
+
+def test_same_name_and_date_locations_keep_their_own_records(tmp_path):
+    previous = [
+        {'Business_Name': 'Sprint Store', 'last_update_date': '2013-7-30',
+         'street_address': '1 First Ave, New York, NY 10001', 'materials_accepted': ['Cell Phones']},
+        {'Business_Name': 'Sprint Store', 'last_update_date': '2013-7-30',
+         'street_address': '2 Second Ave, New York, NY 10001', 'materials_accepted': ['Cell Phones']}
+    ]
+    # The First Ave location dropped out of the search results
+    listings = [make_listing('Sprint Store', '2013-7-30', '2 Second Ave, New York, NY 10001', 'https://x/location/2/')]
+
+    records, fetched = run_incremental(tmp_path, previous, listings)
+
+    assert fetched == []
+    assert [record['street_address'] for record in records] == ['2 Second Ave, New York, NY 10001']
+
+
+def test_listing_without_an_address_match_is_fetched(tmp_path):
+    previous = [
+        {'Business_Name': 'Sprint Store', 'last_update_date': '2013-7-30',
+         'street_address': '1 First Ave, New York, NY 10001', 'materials_accepted': ['Cell Phones']}
+    ]
+    listings = [
+        make_listing('Sprint Store', '2013-7-30', '3 Third Ave, New York, NY 10001', 'https://x/location/3/'),
+        make_listing('Sprint Store', '2013-7-30', '1 First Ave, New York, NY 10001', 'https://x/location/1/')
+    ]
+
+    records, fetched = run_incremental(tmp_path, previous, listings)
+
+    assert fetched == ['https://x/location/3/']
+    assert [record['street_address'] for record in records] == [
+        '3 Fetched St, New York, NY 10001',
+        '1 First Ave, New York, NY 10001'
+    ]
@@ -0,0 +1,13 @@
+from rate_limit import AdaptiveRateLimiter
+
+
+def test_configure_does_not_keep_an_earlier_raised_ceiling():
+    limiter = AdaptiveRateLimiter(initial_rate=2.0, max_rate=8.0)
+    limiter.configure(500.0)
+    assert limiter.max_rate == 500.0
+
+    limiter.configure(2.0)
+    assert limiter.max_rate == 8.0
+    for _ in range(10000):
+        limiter.on_success('https://search.earth911.com/location/1/', 0.1)
+    assert limiter.hosts['search.earth911.com']['rate'] <= 8.0
@@ -0,0 +1,154 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# urllib3 and httpx only decode brotli when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class TransportError(Exception):
+    """Connection failure, timeout or other error that produced no HTTP response"""
+
+
+class TransportResponse:
+    def __init__(self, status_code, headers, text, wire_bytes, decoded_bytes):
+        """Client-independent view of one HTTP response"""
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.wire_bytes = wire_bytes
+        self.decoded_bytes = decoded_bytes
+
+
+class Transport:
+    def __init__(self, pool_size=10, headers=None):
+        """Shared interface and byte accounting for the HTTP clients"""
+        self.pool_size = pool_size
+        self.headers = {
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive'
+        }
+        self.headers.update(headers or {})
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0}
+
+    def record(self, wire_bytes, decoded_bytes):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['wire_bytes'] += wire_bytes
+            self.stats['decoded_bytes'] += decoded_bytes
+
+    def ensure_pool_size(self, pool_size):
+        """Grow the connection pool so every worker can hold a keep-alive connection"""
+        if pool_size > self.pool_size:
+            self.pool_size = pool_size
+            self.resize_pool()
+
+    def resize_pool(self):
+        pass
+
+    def get(self, url, headers=None, timeout=10):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def summary(self):
+        wire = self.stats['wire_bytes']
+        decoded = self.stats['decoded_bytes']
+        saved = (1 - wire / decoded) * 100 if decoded else 0.0
+        return (f"transport: {self.stats['requests']} responses, {wire / 1024:.1f} KiB on the wire, "
+                f"{decoded / 1024:.1f} KiB decoded ({saved:.0f}% saved by compression)")
+
+
+class RequestsTransport(Transport):
+    def __init__(self, pool_size=10, headers=None):
+        """requests.Session with a keep-alive pool sized for the worker count"""
+        super().__init__(pool_size, headers)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.resize_pool()
+
+    def resize_pool(self):
+        # Retries are handled by the scraper, so the adapter must not retry on its own
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, timeout=10):
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            text = response.text
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+
+        # urllib3 counts the bytes read from the socket before content decoding
+        decoded_bytes = len(response.content)
+        wire_bytes = response.raw.tell() if response.raw is not None else decoded_bytes
+        self.record(wire_bytes, decoded_bytes)
+        return TransportResponse(response.status_code, response.headers, text, wire_bytes, decoded_bytes)
+
+    def close(self):
+        self.session.close()
+
+
+class HttpxTransport(Transport):
+    def __init__(self, pool_size=10, headers=None, http2=False):
+        """httpx client with the same interface, plus an asyncio variant in aget"""
+        import httpx
+
+        super().__init__(pool_size, headers)
+        self.httpx = httpx
+        self.http2 = http2
+        self.client = None
+        self.async_client = None
+        self.resize_pool()
+
+    def resize_pool(self):
+        limits = self.httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        if self.client is not None:
+            self.client.close()
+        self.client = self.httpx.Client(headers=self.headers, limits=limits, http2=self.http2)
+        # The async client is built lazily inside the running event loop
+        self.async_client = None
+
+    def _to_response(self, response):
+        decoded_bytes = len(response.content)
+        wire_bytes = response.num_bytes_downloaded
+        self.record(wire_bytes, decoded_bytes)
+        return TransportResponse(response.status_code, response.headers, response.text, wire_bytes, decoded_bytes)
+
+    def get(self, url, headers=None, timeout=10):
+        try:
+            response = self.client.get(url, headers=headers, timeout=timeout)
+        except self.httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        return self._to_response(response)
+
+    async def aget(self, url, headers=None, timeout=10):
+        """Coroutine version of get for asyncio callers"""
+        if self.async_client is None:
+            limits = self.httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self.async_client = self.httpx.AsyncClient(headers=self.headers, limits=limits, http2=self.http2)
+        try:
+            response = await self.async_client.get(url, headers=headers, timeout=timeout)
+        except self.httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        return self._to_response(response)
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+
+    def close(self):
+        self.client.close()